@@ -0,0 +1,221 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# Anomalies written per transaction at most, and seconds a recorded anomaly
+# may wait for its batch
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+# Anomalies waiting to be written before new ones are dropped
+DEFAULT_QUEUE_SIZE = 10000
+
+# Rows per page of query() unless a limit is given, and the most allowed
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS anomalies (
+    id INTEGER PRIMARY KEY,
+    anomaly_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    frequency REAL NOT NULL,
+    confidence REAL NOT NULL,
+    signal_strength REAL NOT NULL,
+    duration REAL NOT NULL,
+    is_classified INTEGER NOT NULL,
+    is_known INTEGER NOT NULL,
+    classification TEXT
+);
+CREATE INDEX IF NOT EXISTS anomalies_timestamp ON anomalies (timestamp);
+CREATE INDEX IF NOT EXISTS anomalies_frequency ON anomalies (frequency, timestamp);
+CREATE INDEX IF NOT EXISTS anomalies_classification ON anomalies (classification, timestamp);
+"""
+
+COLUMNS = "id, anomaly_id, timestamp, frequency, confidence, signal_strength, duration, is_classified, is_known, classification"
+
+
+def _row(anomaly):
+    return (
+        anomaly['id'], anomaly['timestamp'], anomaly['frequency'], anomaly['confidence'],
+        anomaly['signalStrength'], anomaly['duration'], int(anomaly['isClassified']), int(anomaly['isKnown']),
+        anomaly['classification']
+    )
+
+
+# Row as returned by the API, in the same format as the in-memory anomalies
+def _record(row):
+    return {
+        'id': row[1],
+        'timestamp': row[2],
+        'frequency': row[3],
+        'confidence': row[4],
+        'signalStrength': row[5],
+        'duration': row[6],
+        'isClassified': bool(row[7]),
+        'isKnown': bool(row[8]),
+        'classification': row[9]
+    }
+
+
+# Persistent history of every reported anomaly, in an SQLite database in WAL
+# mode so queries never block writes and several processes can read it.
+#
+# record() only queues the anomaly; a writer thread, started on first use,
+# inserts queued anomalies in batches of up to `batch_size` per transaction,
+# at most `flush_interval` seconds after they were recorded. If writing falls
+# more than `queue_size` anomalies behind, new ones are dropped and counted
+# rather than slowing down the detector.
+#
+# Rows are indexed by timestamp, by (frequency, timestamp) and by
+# (classification, timestamp), so time-range, band and class filters stay
+# fast at millions of rows. query() pages with a keyset cursor instead of an
+# offset, so deep pages cost the same as the first one.
+class AnomalyHistory:
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 queue_size=DEFAULT_QUEUE_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._local = threading.local()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+        connection.execute("PRAGMA optimize")
+
+    # One connection per thread; sqlite3 connections can't be shared
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")  # Safe in WAL mode; may lose the last batch on power loss
+            self._local.connection = connection
+        return connection
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    # Queue `anomaly` (a dict as stored in the anomaly buffer) for writing
+    def record(self, anomaly):
+        self._start_writer()
+        try:
+            self._queue.put_nowait(_row(anomaly))
+            self.recorded += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _start_writer(self):
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run_writer, daemon=True)
+                self._writer.start()
+
+    def _run_writer(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self.write(batch)
+            except sqlite3.Error as e:
+                print(f"Error writing {len(batch)} anomalies to {self.path}: {e}")
+
+    # Write whatever is still queued from the calling thread, e.g. at exit
+    def flush(self):
+        rows = []
+        while True:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if rows:
+            self.write(rows)
+
+    # Insert rows in one transaction (the writer thread's batches, or bulk loads)
+    def write(self, rows):
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "INSERT INTO anomalies (anomaly_id, timestamp, frequency, confidence, signal_strength, duration,"
+                " is_classified, is_known, classification) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        self.written += len(rows)
+
+    # Anomalies matching all given filters, newest first, and the cursor of the
+    # next page (None on the last one). `start`/`end` bound the timestamp
+    # (inclusive), `min_frequency`/`max_frequency` the frequency in MHz;
+    # `classifications` is a list of class names.
+    def query(self, start=None, end=None, min_frequency=None, max_frequency=None, classifications=None,
+              limit=DEFAULT_PAGE_SIZE, cursor=None):
+        conditions, params = [], []
+        if start is not None:
+            conditions.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("timestamp <= ?")
+            params.append(end)
+        if min_frequency is not None:
+            conditions.append("frequency >= ?")
+            params.append(min_frequency)
+        if max_frequency is not None:
+            conditions.append("frequency <= ?")
+            params.append(max_frequency)
+        if classifications:
+            conditions.append(f"classification IN ({', '.join('?' * len(classifications))})")
+            params.extend(classifications)
+        if cursor is not None:
+            # Rows after the last one of the previous page, in (timestamp, id) order
+            timestamp, row_id = parse_cursor(cursor)
+            conditions.append("(timestamp < ? OR (timestamp = ? AND id < ?))")
+            params.extend((timestamp, timestamp, row_id))
+
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._connection().execute(
+            f"SELECT {COLUMNS} FROM anomalies {where} ORDER BY timestamp DESC, id DESC LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1][2]!r}:{rows[-1][0]}"
+        return [_record(row) for row in rows], next_cursor
+
+    def count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM anomalies").fetchone()[0]
+
+    def stats(self):
+        return {
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "pending": self.pending
+        }
+
+
+# Cursor of query() as (timestamp, row id); raises ValueError if malformed
+def parse_cursor(cursor):
+    timestamp, row_id = cursor.rsplit(":", 1)
+    return float(timestamp), int(row_id)
@@ -1,19 +1,21 @@
 import sys
 import os
+import atexit
+from importlib.util import find_spec
 
 # Setup better error handling for missing dependencies
 required_packages = [
     'flask', 'flask_cors', 'numpy', 'pandas', 
-    'sklearn', 'scipy', 'matplotlib', 'joblib'
+    'sklearn', 'scipy', 'joblib'
 ]
 
 missing_packages = []
 
-# Check for required packages
+# Check for required packages. They are only located here, not imported: the
+# heavy ones (scikit-learn, scipy, pandas, joblib) load on first use, so the
+# server starts answering requests right away
 for package in required_packages:
-    try:
-        __import__(package)
-    except ImportError:
+    if find_spec(package) is None:
         missing_packages.append(package)
 
 # If any packages are missing, print helpful error message
@@ -29,154 +31,200 @@ if missing_packages:
     sys.exit(1)
 
 # Now import all required packages
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, Response
 from flask_cors import CORS
 import numpy as np
 import json
 import threading
 import time
 from datetime import datetime
-import joblib
-from scipy import signal as scipy_signal
-import pandas as pd
-from sklearn.ensemble import IsolationForest
-import matplotlib.pyplot as plt
-import io
-import base64
-
-# Try to import RTL-SDR library - will fail if hardware not available
-try:
-    import rtlsdr
-    RTL_SDR_AVAILABLE = True
-except ImportError:
-    RTL_SDR_AVAILABLE = False
-    print("\nNote: RTL-SDR library not available. Will use dataset for signal processing.")
-    print("If you want to use actual SDR hardware, install the pyrtlsdr package:")
-    print("pip install pyrtlsdr\n")
+from dataset_store import DatasetStore, stratified_sample
+from dataset_generator import SampleDatasetPlan, write_dataset, binary_path_for
+from model_store import ModelStore, file_fingerprint
+from signal_buffer import signal_records
+from engine import DetectionEngine
+from pipeline import AcquisitionPipeline
+from capture_replay import CaptureReplay, DEFAULT_FRAME_SECONDS
+from anomaly_history import AnomalyHistory, parse_cursor, DEFAULT_PAGE_SIZE
+from event_stream import EventBroadcaster, sse_message
+from metrics import MetricsRegistry, RateMeter, sample_profile
+from wire_format import negotiate, mimetype_for, encode_spectrogram, encode_signals, FLOAT32_MIME
+from scoring import score_batch, classify_anomalies
+from spectrogram import bin_spectrogram, RollingSpectrogram, DEFAULT_MAX_TIME_POINTS
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Buffer sizes, overridable through the environment
+SIGNAL_BUFFER_CAPACITY = int(os.environ.get("RF_SIGNAL_BUFFER_CAPACITY", 1000))
+ANOMALY_BUFFER_CAPACITY = int(os.environ.get("RF_ANOMALY_BUFFER_CAPACITY", 100))
+
 # Global variables
-signal_data = []
-anomaly_results = []
-processing_thread = None
-is_running = False
-current_config = {
+sdr_stream = None  # Persistent SDR (or IQ replay) stream, opened on first use
+sdr_stream_lock = threading.Lock()
+sdr_open_failed_at = None  # When opening the SDR device last failed
+SDR_RETRY_INTERVAL = 30.0  # Seconds before a failed device open is retried
+last_anomaly_time = 0  # Used to rate limit anomalies
+
+# Push stream for dashboards: every tick's results are serialized once and
+# queued for each connected client (at most RF_STREAM_QUEUE_SIZE events behind)
+event_broadcaster = EventBroadcaster(int(os.environ.get("RF_STREAM_QUEUE_SIZE", 64)))
+STREAM_SIGNAL_LIMIT = 500  # Most recent signals of a frame pushed to clients
+
+# Hot-path instrumentation, exposed in Prometheus text format at /api/metrics
+metrics = MetricsRegistry()
+PROCESSING_STAGES = ("acquire", "spectrogram", "score", "classify", "publish", "frame")
+stage_seconds = {
+    stage: metrics.histogram("rf_stage_seconds", "Seconds spent per frame in each processing stage", {"stage": stage})
+    for stage in PROCESSING_STAGES
+}
+frame_latency = metrics.histogram("rf_frame_latency_seconds", "Seconds from acquiring a frame to the end of its processing")
+model_fit_seconds = {
+    source: metrics.histogram("rf_model_load_seconds", "Seconds to train or load the detector at start", {"source": source})
+    for source in ("trained", "loaded")
+}
+samples_processed = metrics.counter("rf_samples_processed_total", "Samples run through the detector")
+anomaly_candidates = metrics.counter("rf_anomaly_candidates_total", "Samples scored as anomalous")
+anomalies_reported = metrics.counter("rf_anomalies_reported_total", "Anomalies reported after rate limiting")
+sample_rate = RateMeter()
+anomaly_rate = RateMeter()
+
+# Opt-in sampling profiler at /api/profile
+PROFILER_ENABLED = os.environ.get("RF_PROFILER", "0") == "1"
+
+# Signal and anomaly buffers, rolling spectrogram, active config and run state,
+# shared between the processing thread and request threads (see engine.py)
+engine = DetectionEngine({
     "frequencyRange": [80, 108],  # FM radio band as default
     "sensitivityThreshold": 0.75,
     "samplingRate": 2.4,
     "windowSize": 1024,
     "aiModelEnabled": True,
     "detectionMode": "passive"
-}
+}, SIGNAL_BUFFER_CAPACITY, ANOMALY_BUFFER_CAPACITY)
+
+# Gauges and counters that already exist elsewhere are read at scrape time
+def pipeline_stat(name):
+    return lambda: engine.pipeline.stats()[name] if engine.pipeline else 0
+
+metrics.gauge_fn("rf_samples_per_second", "Samples processed per second over the last 10 seconds", sample_rate.rate)
+metrics.gauge_fn("rf_anomalies_per_second", "Anomaly candidates per second over the last 10 seconds", anomaly_rate.rate)
+metrics.gauge_fn("rf_running", "Whether signal processing is running", lambda: int(engine.running))
+metrics.counter_fn("rf_frames_acquired_total", "Frames read from the source in the current run", pipeline_stat("framesAcquired"))
+metrics.counter_fn("rf_frames_dropped_total", "Live frames dropped because the detector fell behind", pipeline_stat("framesDropped"))
+metrics.counter_fn("rf_empty_reads_total", "Reads that returned no samples", pipeline_stat("emptyReads"))
+metrics.gauge_fn("rf_pipeline_queue_depth", "Frames waiting for the detector", pipeline_stat("queueDepth"))
+metrics.gauge_fn("rf_signal_buffer_samples", "Samples held in the signal buffer", lambda: len(engine.signals))
+metrics.gauge_fn("rf_signal_buffer_capacity", "Capacity of the signal buffer", lambda: engine.signals.capacity)
+metrics.gauge_fn("rf_anomaly_buffer_entries", "Anomalies held in the anomaly buffer", lambda: len(engine.anomalies))
+metrics.gauge_fn("rf_anomaly_buffer_capacity", "Capacity of the anomaly buffer", lambda: engine.anomalies.capacity)
+metrics.gauge_fn("rf_stream_subscribers", "Connected /api/stream clients", lambda: event_broadcaster.stats()["subscribers"])
+metrics.gauge_fn("rf_stream_max_queue_depth", "Longest /api/stream client queue", lambda: event_broadcaster.stats()["maxQueueDepth"])
+metrics.counter_fn("rf_stream_events_dropped_total", "Events dropped for slow /api/stream clients", lambda: event_broadcaster.events_dropped)
+
+def history_stat(name):
+    return lambda: anomaly_history.stats()[name] if anomaly_history else 0
+
+metrics.counter_fn("rf_anomaly_history_written_total", "Anomalies written to the history database", history_stat("written"))
+metrics.counter_fn("rf_anomaly_history_dropped_total", "Anomalies dropped because history writes fell behind", history_stat("dropped"))
+metrics.gauge_fn("rf_anomaly_history_pending", "Anomalies waiting to be written to the history database", history_stat("pending"))
 
-# ML model for anomaly detection
-anomaly_detector = IsolationForest(contamination=0.05, random_state=42)
+# ML model for anomaly detection, loaded or trained by the first run (or the
+# warm-up thread started with the server)
+MODEL_PARAMS = {"contamination": 0.05, "random_state": 42}
+anomaly_detector = None  # IsolationForest
 is_model_trained = False
+trained_model_key = None  # Dataset fingerprint and training size the detector was fitted for
+scoring_model = None  # The detector above, a ShardedDetector or an OnlineDetector
+model_lock = threading.Lock()  # Held while the detector is loaded or trained
+
+# scikit-learn takes about a second to import, so it is imported here, on first use
+def new_detector():
+    from sklearn.ensemble import IsolationForest
+    return IsolationForest(**MODEL_PARAMS)
+
+# "static", "sharded" or "online"
+def model_mode(model):
+    return getattr(model, "mode", "static")
+
+# 0 while online learning is off or before its first refit, like the other stats
+def online_stat(name):
+    return lambda: (scoring_model.stats()[name] or 0) if model_mode(scoring_model) == "online" else 0
+
+metrics.gauge_fn("rf_online_last_refit_seconds", "Duration of the last online model refit", online_stat("lastRefitSeconds"))
+metrics.counter_fn("rf_online_model_swaps_total", "Online model refits swapped in", online_stat("swapCount"))
 
 # Sample dataset path - replace with actual dataset if available
 DATASET_PATH = os.path.join(os.path.dirname(__file__), "data", "rf_signals_dataset.csv")
-if not os.path.exists(os.path.join(os.path.dirname(__file__), "data")):
-    os.makedirs(os.path.join(os.path.dirname(__file__), "data"))
 
-# Create a sample dataset if one doesn't exist
+# Optional recorded IQ capture that stands in for the SDR device, replayed in
+# real time unless RF_IQ_REPLAY_REALTIME=0
+IQ_REPLAY_PATH = os.environ.get("RF_IQ_REPLAY_PATH")
+IQ_REPLAY_REALTIME = os.environ.get("RF_IQ_REPLAY_REALTIME", "1") != "0"
+
+# Optional recorded capture of signal rows that replaces the sample dataset.
+# It is memory mapped and walked in RF_CAPTURE_FRAME_SECONDS frames, at capture
+# speed unless RF_CAPTURE_REALTIME=0
+CAPTURE_PATH = os.environ.get("RF_CAPTURE_PATH")
+CAPTURE_REALTIME = os.environ.get("RF_CAPTURE_REALTIME", "1") != "0"
+CAPTURE_FRAME_SECONDS = float(os.environ.get("RF_CAPTURE_FRAME_SECONDS", DEFAULT_FRAME_SECONDS))
+capture_replay = None  # Opened on first use
+
+# Every reported anomaly is also kept in this SQLite database, which survives
+# clear-anomalies and restarts; set RF_ANOMALY_HISTORY_PATH empty to disable
+ANOMALY_HISTORY_PATH = os.environ.get(
+    "RF_ANOMALY_HISTORY_PATH", os.path.join(os.path.dirname(__file__), "data", "anomaly_history.sqlite3")
+)
+anomaly_history = None  # Opened on first use
+anomaly_history_lock = threading.Lock()
+
+# Seconds between dataset ticks unless the config sets "tickInterval" (0 = full rate)
+DATASET_TICK_INTERVAL = 0.5
+
+# Dataset kept resident in memory, reloaded only when the file changes
+dataset_store = DatasetStore(DATASET_PATH)
+
+# Fitted models are cached here, keyed by dataset hash and hyperparameters
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "data", "models")
+model_store = ModelStore(MODEL_DIR)
+
+# Rows used to fit the detector; 0 fits on the whole dataset, otherwise a
+# stratified subsample of this size
+TRAINING_SAMPLE_SIZE = int(os.environ.get("RF_TRAINING_SAMPLE_SIZE", 0))
+
+# Time points in the generated sample dataset; large values are streamed to
+# disk in chunks
+SAMPLE_DATASET_POINTS = int(os.environ.get("RF_SAMPLE_DATASET_POINTS", 5000))
+
+# Create a sample dataset (CSV plus binary copy) if one doesn't exist
 def create_sample_dataset():
     if not os.path.exists(DATASET_PATH):
         print("Creating sample RF dataset...")
-        # Time points
-        t = np.linspace(0, 10, 5000)  # Reduced number of time points
-        
-        # Create normal signals (FM radio stations)
-        normal_signals = []
-        for freq in [88.5, 91.7, 95.3, 98.1, 102.5, 105.9]:
-            amplitude = np.random.uniform(0.5, 1.0)
-            phase = np.random.uniform(0, 2*np.pi)
-            noise = np.random.normal(0, 0.05, len(t))
-            # FM modulation simulation
-            modulator = np.sin(2*np.pi*0.1*t)  # Low frequency modulator
-            signal_data = amplitude * np.sin(2*np.pi*freq*t + phase + 0.5*modulator) + noise
-            
-            # Only add a subset of points to reduce signal count
-            for i in range(0, len(t), 5):  # Add every 5th point
-                normal_signals.append({
-                    'time': t[i],
-                    'frequency': freq,
-                    'amplitude': signal_data[i],
-                    'is_anomaly': 0
-                })
-        
-        # Create anomaly signals
-        anomaly_signals = []
-        # Frequency hopping signal (potentially malicious)
-        for i, time in enumerate(t):
-            if i % 100 == 0:  # Hop frequency
-                hop_freq = np.random.choice([89.2, 93.4, 97.8, 104.3])
-            
-            # Only add points at a slower rate
-            if i % 20 == 0:
-                amplitude = np.random.uniform(0.2, 0.4)
-                noise = np.random.normal(0, 0.02)
-                signal_val = amplitude * np.sin(2*np.pi*hop_freq*time) + noise
-                
-                anomaly_signals.append({
-                    'time': time,
-                    'frequency': hop_freq,
-                    'amplitude': signal_val,
-                    'is_anomaly': 1
-                })
-        
-        # High-power burst (potentially jamming) - increase their visibility
-        burst_times = np.random.choice(t, size=20, replace=False)  # Fewer but more visible bursts
-        for time in burst_times:
-            burst_freq = np.random.uniform(90, 100)
-            for i in range(5):  # Duration of burst (shorter)
-                if i + np.where(t == time)[0][0] < len(t):
-                    idx = i + np.where(t == time)[0][0]
-                    anomaly_signals.append({
-                        'time': t[idx],
-                        'frequency': burst_freq,
-                        'amplitude': np.random.uniform(3, 5),  # Higher power to stand out more
-                        'is_anomaly': 1
-                    })
-        
-        # Make sure anomalies are a larger percentage of the dataset
-        # Calculate how many anomalies to add to make them ~15% of the dataset
-        normal_count = len(normal_signals)
-        anomaly_count = len(anomaly_signals)
-        target_anomaly_percent = 0.15
-        
-        if anomaly_count / (normal_count + anomaly_count) < target_anomaly_percent:
-            # Add more anomalies to reach target percentage
-            more_needed = int((normal_count * target_anomaly_percent) / (1 - target_anomaly_percent)) - anomaly_count
-            
-            if more_needed > 0:
-                # Add spy transmission (continuous low power on unusual frequency)
-                spy_freq = 94.2  # An unusual frequency
-                for i in range(0, len(t), 10):  # Add every 10th point
-                    if len(anomaly_signals) < anomaly_count + more_needed:
-                        anomaly_signals.append({
-                            'time': t[i],
-                            'frequency': spy_freq + np.random.normal(0, 0.05),  # Slight frequency drift
-                            'amplitude': np.random.uniform(0.3, 0.5),  # Low power
-                            'is_anomaly': 1
-                        })
-        
-        # Combine and shuffle
-        all_signals = normal_signals + anomaly_signals
-        np.random.shuffle(all_signals)
-        
-        # Convert to DataFrame and save
-        df = pd.DataFrame(all_signals)
-        df.to_csv(DATASET_PATH, index=False)
-        print(f"Created sample dataset with {len(df)} entries - {len(anomaly_signals)} anomalies ({len(anomaly_signals)/len(all_signals)*100:.1f}%)")
-        return df
-    else:
-        return pd.read_csv(DATASET_PATH)
+        os.makedirs(os.path.dirname(DATASET_PATH), exist_ok=True)
+        plan = SampleDatasetPlan(SAMPLE_DATASET_POINTS)
+        rows = write_dataset(plan, DATASET_PATH, binary_path_for(DATASET_PATH))
+        print(f"Created sample dataset with {rows} entries - {plan.anomaly_count} anomalies ({plan.anomaly_count/rows*100:.1f}%)")
+
+# The RTL-SDR library, imported on first use; None if it isn't installed
+rtlsdr = None
+rtlsdr_checked = False
+
+def load_rtlsdr():
+    global rtlsdr, rtlsdr_checked
+    if not rtlsdr_checked:
+        rtlsdr_checked = True
+        try:
+            import rtlsdr as rtlsdr_module
+            rtlsdr = rtlsdr_module
+        except ImportError:
+            print("\nNote: RTL-SDR library not available. Will use dataset for signal processing.")
+            print("If you want to use actual SDR hardware, install the pyrtlsdr package:")
+            print("pip install pyrtlsdr\n")
+    return rtlsdr
 
 # Function to try initializing RTL-SDR
 def init_rtlsdr():
-    if not RTL_SDR_AVAILABLE:
+    if load_rtlsdr() is None:
         return None
     
     try:
@@ -195,209 +243,337 @@ def init_rtlsdr():
         print(f"Failed to initialize RTL-SDR: {e}")
         return None
 
+# Open the SDR stream once and keep it for subsequent reads
+def get_sdr_stream():
+    global sdr_stream, sdr_open_failed_at
+    
+    with sdr_stream_lock:
+        if sdr_stream is None:
+            # scipy comes in with the SDR stream, only when hardware is wanted
+            from sdr_stream import SDRStream, RtlSdrSource, IQFileSource
+            if IQ_REPLAY_PATH:
+                sdr_stream = SDRStream(IQFileSource(IQ_REPLAY_PATH, realtime=IQ_REPLAY_REALTIME))
+                print(f"Replaying IQ capture {IQ_REPLAY_PATH}")
+            elif sdr_open_failed_at is None or time.monotonic() - sdr_open_failed_at >= SDR_RETRY_INTERVAL:
+                # A missing device is not retried on every frame
+                sdr = init_rtlsdr()
+                if sdr:
+                    sdr_stream = SDRStream(RtlSdrSource(sdr))
+                    sdr_open_failed_at = None
+                else:
+                    sdr_open_failed_at = time.monotonic()
+                    print(f"No SDR device, using the dataset (retrying in {SDR_RETRY_INTERVAL:.0f}s)")
+        return sdr_stream
+
+def close_sdr_stream():
+    global sdr_stream
+    
+    with sdr_stream_lock:
+        if sdr_stream is not None:
+            try:
+                sdr_stream.close()
+            except Exception as e:
+                print(f"Error closing SDR: {e}")
+            sdr_stream = None
+
+# Open the recorded capture once; it keeps its position between runs
+def get_capture_replay():
+    global capture_replay
+    
+    if capture_replay is None and CAPTURE_PATH:
+        capture_replay = CaptureReplay(CAPTURE_PATH, frame_seconds=CAPTURE_FRAME_SECONDS, realtime=CAPTURE_REALTIME)
+        print(f"Replaying capture {CAPTURE_PATH} ({len(capture_replay)} rows)")
+    return capture_replay
+
+def get_anomaly_history():
+    global anomaly_history
+    
+    if anomaly_history is None and ANOMALY_HISTORY_PATH:
+        with anomaly_history_lock:
+            if anomaly_history is None:
+                anomaly_history = AnomalyHistory(ANOMALY_HISTORY_PATH)
+                atexit.register(anomaly_history.flush)  # Don't lose the last batch on shutdown
+    return anomaly_history
+
+# Whether the config asks for hardware (or a replayed capture) instead of the dataset
+def wants_hardware(config):
+    return bool(IQ_REPLAY_PATH) or bool(config.get("hardwareConnection", {}).get("enabled"))
+
+# Whether frames really come from the SDR stream (or IQ replay); when the
+# device couldn't be opened, get_rf_data falls back to the dataset
+def using_hardware(config):
+    return wants_hardware(config) and sdr_stream is not None
+
+# Only a real device is live; files, replays and the dataset fallback can wait
+# for the detector
+def is_live_source(config):
+    return using_hardware(config) and not IQ_REPLAY_PATH
+
+# Seconds between acquisitions; hardware reads block until their data arrives
+def tick_interval(config):
+    if using_hardware(config) or CAPTURE_PATH:
+        return 0.0  # Capture replays pace themselves
+    return float(config.get("tickInterval", DATASET_TICK_INTERVAL))
+
 # Get RF data either from hardware or dataset
 def get_rf_data(config, use_dataset=True):
     if not use_dataset:
-        sdr = init_rtlsdr()
-        if sdr:
+        stream = get_sdr_stream()
+        if stream:
             try:
-                # Configure SDR based on current config
-                center_freq = (config["frequencyRange"][0] + config["frequencyRange"][1]) / 2 * 1e6
-                sdr.center_freq = center_freq
-                sdr.sample_rate = config["samplingRate"] * 1e6
-                
-                # Read samples
-                samples = sdr.read_samples(config["windowSize"])
-                sdr.close()
-                
-                # Process samples
-                powers = np.abs(samples)**2
-                freqs = np.linspace(
-                    config["frequencyRange"][0], 
-                    config["frequencyRange"][1], 
-                    len(powers)
-                )
-                
-                # Convert to our expected format
-                return [{
-                    'time': datetime.now().timestamp(),
-                    'frequency': freqs[i],
-                    'amplitude': powers[i],
-                    'is_anomaly': 0  # Will be determined by ML
-                } for i in range(len(freqs))]
+                # One large block of IQ samples, returned as Welch PSD frames
+                return stream.read(config)
             except Exception as e:
                 print(f"Error reading from SDR: {e}")
-                return get_rf_data(config, use_dataset=True)
-        else:
-            return get_rf_data(config, use_dataset=True)
-    
-    # Use dataset
-    df = pd.read_csv(DATASET_PATH)
+                close_sdr_stream()
+        return get_rf_data(config, use_dataset=True)
     
-    # Filter based on frequency range
-    df_filtered = df[(df['frequency'] >= config["frequencyRange"][0]) & 
-                    (df['frequency'] <= config["frequencyRange"][1])]
+    # Use the recorded capture - the next frame in time order
+    if CAPTURE_PATH:
+        return get_capture_replay().read(config["frequencyRange"])
     
-    # Get a random time slice
-    times = df_filtered['time'].unique()
-    if len(times) == 0:
-        return []
-    
-    # Get random consecutive chunk of data
-    random_start = np.random.randint(0, max(1, len(times) - 100))
-    selected_times = times[random_start:random_start + 100]
-    chunk_data = df_filtered[df_filtered['time'].isin(selected_times)]
-    
-    return chunk_data.to_dict('records')
+    # Use dataset - pick a random window of 100 consecutive timestamps
+    return dataset_store.window(config["frequencyRange"], n_times=100)
 
-# Process signals and detect anomalies
-def process_signals():
-    global signal_data, anomaly_results, is_running, current_config, is_model_trained, anomaly_detector
-    
-    # Create sample dataset if needed
-    create_sample_dataset()
-    
-    # Load some initial data for training
-    initial_data = pd.read_csv(DATASET_PATH)
-    X_train = initial_data[['frequency', 'amplitude']].values
+# Features (frequency, amplitude) the detector is fitted on
+def training_features(sample_size=None):
+    rows = dataset_store.rows()
+    sample_size = TRAINING_SAMPLE_SIZE if sample_size is None else sample_size
+    if sample_size:
+        rows = rows[stratified_sample(rows, sample_size)]
+    return np.column_stack((rows['frequency'], rows['amplitude']))
+
+# Acquire one frame with a single, consistent view of the config
+def acquire_frame():
+    config = engine.config
+    with stage_seconds["acquire"].time():
+        return get_rf_data(config, use_dataset=not wants_hardware(config))
+
+# Create the sample dataset if needed, then load the trained model from disk,
+# or train and save it, unless it is already current. Returns the detector and
+# the dataset fingerprint it belongs to.
+def load_detector():
+    global is_model_trained, trained_model_key, anomaly_detector
+    
+    with model_lock:
+        create_sample_dataset()
+        
+        # Fingerprint whichever file the dataset is actually loaded from (CSV or .npy)
+        dataset_store.rows()
+        fingerprint = file_fingerprint(dataset_store.source_path)
+        if not is_model_trained or trained_model_key != (fingerprint, TRAINING_SAMPLE_SIZE):
+            started = time.perf_counter()
+            anomaly_detector, loaded = model_store.load_or_fit(
+                "isolation-forest", dict(MODEL_PARAMS, trainingSampleSize=TRAINING_SAMPLE_SIZE), fingerprint,
+                lambda: new_detector().fit(training_features())
+            )
+            is_model_trained = True
+            trained_model_key = (fingerprint, TRAINING_SAMPLE_SIZE)
+            model_fit_seconds["loaded" if loaded else "trained"].observe(time.perf_counter() - started)
+            print(f"{'Loaded' if loaded else 'Trained'} anomaly detection model in {time.perf_counter() - started:.3f}s")
+        return anomaly_detector, fingerprint
+
+# Prepare the dataset and detector in the background when the server starts,
+# so requests are answered while the model loads and the first start is quick
+def warm_up():
+    try:
+        load_detector()
+    except Exception as e:
+        print(f"Error preparing the anomaly detection model: {e}")
+
+# Process signals and detect anomalies; runs until the engine stops this generation
+def process_signals(generation):
+    global scoring_model, last_anomaly_time, sdr_open_failed_at
+    
+    # Settings that choose the detector are read once per run
+    config = engine.config
+    sdr_open_failed_at = None  # Every start tries the device again
+    
+    # Start a fresh spectrogram for the configured band
+    engine.spectrogram = RollingSpectrogram(config["frequencyRange"])
+    
+    detector, fingerprint = load_detector()
+    model_params = dict(MODEL_PARAMS, trainingSampleSize=TRAINING_SAMPLE_SIZE)
+    
+    # With "subBands" > 1 every sub-band gets its own model, scored on a process pool
+    sub_bands = int(config.get("subBands", 1))
+    if sub_bands > 1:
+        from sharded_detection import ShardedDetector
+        sharded = ShardedDetector(config["frequencyRange"], sub_bands, **MODEL_PARAMS)
+        band_models, loaded = model_store.load_or_fit(
+            "sharded-isolation-forest", dict(model_params, edges=sharded.edges.tolist()), fingerprint,
+            lambda: sharded.fit_models(training_features(), fallback=detector)
+        )
+        run_model = sharded.use_models(band_models)
+        workers = f"on {sharded.n_workers} worker processes" if sharded.n_workers else "in-process"
+        print(f"{'Loaded' if loaded else 'Trained'} {sub_bands} sub-band models, scoring {workers}")
+    elif config.get("onlineLearning"):
+        # Keep refitting on recent normal traffic in the background and swap models in
+        from online_model import OnlineDetector, DEFAULT_REFIT_INTERVAL, DEFAULT_RESERVOIR_SIZE
+        run_model = OnlineDetector(
+            detector, MODEL_PARAMS,
+            refit_interval=float(config.get("refitInterval", DEFAULT_REFIT_INTERVAL)),
+            reservoir_size=int(config.get("refitSampleCap", DEFAULT_RESERVOIR_SIZE))
+        )
+    else:
+        run_model = detector
+    # process_frame and the stats endpoints read the model of the latest run
+    scoring_model = run_model
     
-    # Train anomaly detection model if not already trained
-    if not is_model_trained:
-        anomaly_detector.fit(X_train)
-        is_model_trained = True
-        print("Trained anomaly detection model")
+    # "replayStart" moves a capture replay to that capture timestamp
+    if CAPTURE_PATH and "replayStart" in config:
+        get_capture_replay().seek(config["replayStart"])
     
     # Track the last time we added an anomaly to avoid flooding
     last_anomaly_time = 0
-    min_anomaly_interval = 2.0  # Seconds between anomalies
     
-    while is_running:
-        # Get new RF data (from hardware or dataset)
-        new_data = get_rf_data(current_config, use_dataset=True)
+    # Acquisition runs on its own thread and hands frames to this one
+    pipeline = AcquisitionPipeline(
+        acquire=acquire_frame,
+        process=process_frame,
+        tick_interval=lambda: tick_interval(engine.config),
+        is_live=lambda: is_live_source(engine.config),
+        on_latency=frame_latency.observe
+    )
+    engine.pipeline = pipeline
+    pipeline.run(lambda: engine.should_run(generation))
+    
+    # Release this run's worker processes when processing stops, and the
+    # device unless a newer run has already started using it
+    if model_mode(run_model) == "sharded":
+        run_model.close()
+    if engine.is_latest(generation):
+        close_sdr_stream()
+
+# Detect anomalies in one acquired frame and update the shared buffers;
+# returns the number of samples scored
+def process_frame(new_data):
+    global last_anomaly_time
+    
+    min_anomaly_interval = 2.0  # Seconds between anomalies
+    frame_started = time.perf_counter()
+    
+    # A config sent with /api/start while running takes effect here, between ticks
+    config, previous_config = engine.begin_tick()
+    if previous_config is not None and previous_config["frequencyRange"] != config["frequencyRange"]:
+        engine.spectrogram = RollingSpectrogram(config["frequencyRange"])
+    spectrogram = engine.spectrogram
+    
+    # Add to signal data (bounded ring buffer). Frames that fit are worked on
+    # through the stored view from here on; larger ones (SDR PSD frames) keep
+    # only their tail in the buffer, but every row is still binned and scored
+    new_data = engine.signals.append(new_data)
+    
+    # Append the new rows to the rolling spectrogram
+    with stage_seconds["spectrogram"].time():
+        spectrogram_rows = spectrogram.update(new_data['time'], new_data['frequency'], new_data['amplitude'])
+    
+    # Score the whole batch at once; dataset-labelled anomalies always qualify
+    with stage_seconds["score"].time():
+        confidence, candidates = score_batch(scoring_model, new_data, config["sensitivityThreshold"])
+    n_candidates = int(np.count_nonzero(candidates))
+    samples_processed.inc(len(new_data))
+    sample_rate.mark(len(new_data))
+    anomaly_candidates.inc(n_candidates)
+    anomaly_rate.mark(n_candidates)
+    
+    # Feed what looked normal back into the online model
+    if model_mode(scoring_model) == "online":
+        normal = ~candidates & (new_data['is_anomaly'] == 0)
+        scoring_model.observe(np.column_stack((new_data['frequency'][normal], new_data['amplitude'][normal])))
+        scoring_model.maybe_refit()
+    
+    # Rate limiting lets at most one anomaly through per interval - the first candidate
+    new_anomalies = []
+    history = get_anomaly_history()
+    current_time = datetime.now().timestamp()
+    if n_candidates and current_time - last_anomaly_time >= min_anomaly_interval:
+        emitted = np.flatnonzero(candidates)[:1]
+        with stage_seconds["classify"].time():
+            classifications = classify_anomalies(new_data['frequency'][emitted], new_data['amplitude'][emitted])
         
-        if new_data:
-            # Add to signal data (limited buffer)
-            signal_data = (signal_data + new_data)[-1000:]
+        # Python objects are only built for the anomalies actually reported
+        for i, classification in zip(emitted.tolist(), classifications):
+            timestamp = current_time
+            anomaly = {
+                'id': f"anomaly-{timestamp}-{i}",
+                'timestamp': timestamp,
+                'frequency': float(new_data['frequency'][i]),
+                'confidence': float(confidence[i]),
+                'signalStrength': float(new_data['amplitude'][i]),
+                'duration': 1.0,
+                'isClassified': bool(classification),
+                'isKnown': bool(new_data['is_anomaly'][i] == 1),  # Flag dataset anomalies
+                'classification': classification
+            }
             
-            # Extract features for anomaly detection
-            X = np.array([[d['frequency'], d['amplitude']] for d in new_data])
+            # Keep a reasonable number of anomalies
+            engine.anomalies.add(anomaly)
+            new_anomalies.append(anomaly)
             
-            if len(X) > 0:
-                # Detect anomalies
-                predictions = anomaly_detector.predict(X)
-                scores = anomaly_detector.decision_function(X)
-                
-                # Process results
-                current_time = datetime.now().timestamp()
-                for i, (pred, score) in enumerate(zip(predictions, scores)):
-                    # Check if the data point is already marked as an anomaly in the dataset
-                    is_dataset_anomaly = new_data[i]['is_anomaly'] == 1
-                    
-                    # Guarantee that dataset anomalies always show up by treating them specially
-                    if is_dataset_anomaly or pred == -1:  # Known anomaly or detected anomaly
-                        confidence = 1.0 - (score + 0.5) / 0.5 if not is_dataset_anomaly else 0.9  # High confidence for known anomalies
-                        
-                        # Check if we're ready to add another anomaly (rate limiting)
-                        if current_time - last_anomaly_time >= min_anomaly_interval:
-                            # Only detect significant anomalies unless it was marked in the dataset
-                            if is_dataset_anomaly or confidence > current_config["sensitivityThreshold"]:
-                                # Create anomaly result
-                                timestamp = current_time
-                                anomaly = {
-                                    'id': f"anomaly-{timestamp}-{i}",
-                                    'timestamp': timestamp,
-                                    'frequency': new_data[i]['frequency'],
-                                    'confidence': float(confidence),
-                                    'signalStrength': float(new_data[i]['amplitude']),
-                                    'duration': 1.0,
-                                    'isClassified': False,
-                                    'isKnown': is_dataset_anomaly,  # Flag dataset anomalies
-                                    'classification': classify_anomaly(new_data[i]['frequency'], new_data[i]['amplitude'])
-                                }
-                                
-                                if anomaly['classification']:
-                                    anomaly['isClassified'] = True
-                                    
-                                # Keep a reasonable number of anomalies
-                                anomaly_results = ([anomaly] + anomaly_results)[:100]
-                                last_anomaly_time = current_time
-        
-        # Generate spectrogram
-        generate_spectrogram()
-        
-        # Sleep to prevent overloading - longer sleep for more realistic timing
-        time.sleep(0.5)  # Slowed down processing rate
+            # Queued for the history database, written in batches off this thread
+            if history:
+                history.record(anomaly)
+        last_anomaly_time = current_time
+        anomalies_reported.inc(len(new_anomalies))
+    
+    # Push this tick's results to connected dashboards
+    if event_broadcaster.has_subscribers:
+        publish_started = time.perf_counter()
+        pushed = new_data[-STREAM_SIGNAL_LIMIT:]
+        event_broadcaster.publish("signals", {"signals": signal_records(pushed, engine.signals.last_seq - len(pushed) + 1)})
+        if spectrogram_rows is not None:
+            time_points, intensities = spectrogram_rows
+            event_broadcaster.publish("spectrogram-delta", {
+                "timePoints": time_points.tolist(),
+                "intensities": intensities.tolist(),
+                "version": spectrogram.version
+            })
+        if new_anomalies:
+            event_broadcaster.publish("anomalies", {"anomalies": new_anomalies})
+        stage_seconds["publish"].observe(time.perf_counter() - publish_started)
+    
+    stage_seconds["frame"].observe(time.perf_counter() - frame_started)
+    return len(new_data)
 
 # Generate spectrogram from current signal data
-def generate_spectrogram():
-    global signal_data
-    
-    if len(signal_data) < 100:
-        return
-    
-    # Extract data for spectrogram
-    freqs = np.array([d['frequency'] for d in signal_data])
-    times = np.array([d['time'] for d in signal_data])
-    amplitudes = np.array([d['amplitude'] for d in signal_data])
-    
-    # Create a 2D grid for the spectrogram
-    unique_freqs = np.unique(freqs)
-    unique_times = np.unique(times)
-    
-    intensities = np.zeros((len(unique_times), len(unique_freqs)))
-    
-    # Fill the intensity matrix
-    for i, t in enumerate(unique_times):
-        for j, f in enumerate(unique_freqs):
-            matching = (freqs == f) & (times == t)
-            if np.any(matching):
-                intensities[i, j] = np.max(amplitudes[matching])
+def generate_spectrogram(max_time_points=DEFAULT_MAX_TIME_POINTS, time_resolution=None, freq_resolution=None):
+    data = engine.signals.snapshot()
+    
+    return bin_spectrogram(
+        data['time'], data['frequency'], data['amplitude'],
+        max_time_points=max_time_points,
+        time_resolution=time_resolution,
+        freq_resolution=freq_resolution
+    )
 
-# Simple classifier for anomalies
+# Simple classifier for anomalies (see scoring.classify_anomalies for the rules)
 def classify_anomaly(frequency, amplitude):
-    # FM Radio stations should be at standard frequencies
-    fm_stations = [88.1, 89.5, 91.3, 93.7, 95.5, 97.9, 99.3, 101.1, 103.5, 105.9, 107.7]
-    
-    # Check if it's a known FM station
-    is_fm = any(abs(frequency - station) < 0.2 for station in fm_stations)
-    
-    # High power signals
-    if amplitude > 1.5:
-        if is_fm:
-            return "Unusually Strong FM Broadcast"
-        else:
-            return "High Power Transmission"
-    
-    # Medium power, non-standard frequency
-    if 0.5 < amplitude < 1.5 and not is_fm:
-        if 76 <= frequency <= 88:
-            return "Potential Public Service Communication"
-        elif 108 <= frequency <= 137:
-            return "Possible Aircraft Communication"
-        elif 88 <= frequency <= 108:
-            return "Non-standard FM Frequency"
-        else:
-            return "Unknown Signal Source"
-    
-    # Low power signals in unexpected bands
-    if amplitude < 0.5:
-        return "Low Power Covert Signal"
-    
-    return "Unclassified Anomaly"
+    return classify_anomalies([frequency], [amplitude])[0]
+
+# Error message for a posted config the processing thread couldn't run with,
+# or None if it is usable
+def config_error(config):
+    if "frequencyRange" in config:
+        frequency_range = config["frequencyRange"]
+        try:
+            low, high = (float(value) for value in frequency_range)
+        except (TypeError, ValueError):
+            return f"frequencyRange must be [low, high] in MHz, got {frequency_range!r}"
+        if not low < high:
+            return f"frequencyRange must have low < high, got {frequency_range!r}"
+    return None
 
 # Start signal processing thread
 @app.route('/api/start', methods=['POST'])
 def start_processing():
-    global processing_thread, is_running, current_config
+    config = request.json or None
+    error = config_error(config) if config else None
+    if error:
+        return jsonify({"error": error}), 400
     
-    if request.json:
-        current_config = request.json
-    
-    if not is_running:
-        is_running = True
-        processing_thread = threading.Thread(target=process_signals)
-        processing_thread.daemon = True
-        processing_thread.start()
+    # While running, a new config is applied at the next tick boundary
+    if engine.start(process_signals, config):
         return jsonify({"status": "started"})
     else:
         return jsonify({"status": "already running"})
@@ -405,69 +581,151 @@ def start_processing():
 # Stop signal processing
 @app.route('/api/stop', methods=['POST'])
 def stop_processing():
-    global is_running
-    is_running = False
+    engine.stop()
     return jsonify({"status": "stopped"})
 
-# Get current signals
+# Response in one of the binary wire formats (see wire_format.py)
+def binary_response(payload, encoding):
+    response = Response(payload, mimetype=mimetype_for(encoding))
+    response.vary.add('Accept')
+    return response
+
+# Read the "since" cursor and "limit" query parameters. A cursor ahead of the
+# buffer comes from before a server restart and starts over from the beginning.
+def cursor_args(last_seq, default_limit):
+    since = request.args.get('since', None, type=int)
+    limit = request.args.get('limit', None, type=int)
+    if since is not None and since > last_seq:
+        since = 0
+    if limit is None and since is None:
+        limit = default_limit
+    return since, None if limit is None else max(0, limit)
+
+# Get current signals; with ?since=<seq> only the ones added after that
 @app.route('/api/signals', methods=['GET'])
 def get_signals():
-    global signal_data
-    
     # Limit the number of signals to simulate a more realistic rate
-    signals_to_return = signal_data[-20:] if signal_data else []
+    since, limit = cursor_args(engine.signals.last_seq, 20)
+    rows, first_seq = engine.signals.since(since, limit)
     
-    # Add a simulated delay to make it feel more realistic
-    time.sleep(0.1)
+    # Binary clients get the columns straight from the buffer
+    encoding = negotiate(request.accept_mimetypes, (FLOAT32_MIME,))
+    if encoding != 'json':
+        return binary_response(encode_signals(rows, first_seq), encoding)
     
+    signals_to_return = signal_records(rows, first_seq)
     return jsonify({
-        "signals": signals_to_return
+        "signals": signals_to_return,
+        "lastSeq": first_seq + len(rows) - 1 if len(rows) else max(since or 0, first_seq - 1)
     })
 
-# Get current anomalies
+# Get current anomalies; with ?since=<seq> only the ones added after that
 @app.route('/api/anomalies', methods=['GET'])
 def get_anomalies():
-    global anomaly_results
+    since, limit = cursor_args(engine.anomalies.last_seq, 100)
+    if since is None:
+        anomalies = engine.anomalies.snapshot(limit)
+    else:
+        anomalies = engine.anomalies.since(since, limit)
+    return jsonify({
+        "anomalies": anomalies,
+        "lastSeq": anomalies[0]['seq'] if anomalies else since or engine.anomalies.last_seq
+    })
+
+# Search the anomaly history, newest first. Filters: start/end (Unix time),
+# minFrequency/maxFrequency (MHz) and classification (repeatable). Pages hold
+# `limit` anomalies (default 100, at most 1000); pass a page's nextCursor as
+# `cursor` to get the next one.
+@app.route('/api/anomalies/history', methods=['GET'])
+def get_anomaly_history_page():
+    history = get_anomaly_history()
+    if history is None:
+        return jsonify({"error": "anomaly history disabled, set RF_ANOMALY_HISTORY_PATH"}), 404
+    
+    cursor = request.args.get('cursor', None)
+    if cursor is not None:
+        try:
+            parse_cursor(cursor)
+        except ValueError:
+            return jsonify({"error": f"invalid cursor {cursor!r}"}), 400
+    
+    anomalies, next_cursor = history.query(
+        start=request.args.get('start', None, type=float),
+        end=request.args.get('end', None, type=float),
+        min_frequency=request.args.get('minFrequency', None, type=float),
+        max_frequency=request.args.get('maxFrequency', None, type=float),
+        classifications=request.args.getlist('classification'),
+        limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+        cursor=cursor
+    )
     return jsonify({
-        "anomalies": anomaly_results[-100:] if anomaly_results else []
+        "anomalies": anomalies,
+        "nextCursor": next_cursor
     })
 
+# Server-Sent Events stream of new signals, anomalies and spectrogram rows.
+# A client first receives the current spectrogram and anomaly list, then one
+# event per tick and kind; "spectrogram-delta" events carry only the new rows.
+@app.route('/api/stream', methods=['GET'])
+def stream_events():
+    subscription = event_broadcaster.subscribe()
+    
+    initial = []
+    spectrogram = engine.spectrogram
+    snapshot = spectrogram.snapshot() if spectrogram else None
+    if snapshot:
+        initial.append(sse_message("spectrogram", snapshot[1]))
+    initial.append(sse_message("anomalies", json.dumps({"anomalies": engine.anomalies.snapshot(100)})))
+    
+    return Response(
+        event_broadcaster.stream(subscription, initial),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 # Get spectrogram data
 @app.route('/api/spectrogram', methods=['GET'])
 def get_spectrogram():
-    global signal_data
+    # JSON unless the Accept header asks for float32 or uint8 binary
+    encoding = negotiate(request.accept_mimetypes)
     
-    if len(signal_data) < 50:
+    if len(engine.signals) < 50:
+        if encoding != 'json':
+            return binary_response(encode_spectrogram([], [], np.empty((0, 0)), encoding), encoding)
         return jsonify({
             "frequencies": [],
             "timePoints": [],
             "intensities": []
         })
     
-    # Convert signal data to spectrogram format
-    # Use all unique frequencies in the dataset for better resolution
-    freqs = sorted(list(set([d['frequency'] for d in signal_data])))
-    times = sorted(list(set([d['time'] for d in signal_data])))
-    
-    # If we have too many time points, limit to the most recent ones
-    max_time_points = 50
-    if len(times) > max_time_points:
-        times = times[-max_time_points:]
-    
-    # Create a proper intensity matrix
-    intensities = []
-    for t in times:
-        row = []
-        for f in freqs:
-            # Find all signals at this time and frequency
-            matches = [d for d in signal_data if abs(d['time'] - t) < 0.01 and abs(d['frequency'] - f) < 0.01]
-            if matches:
-                # Use the maximum amplitude
-                row.append(max([d['amplitude'] for d in matches]))
-            else:
-                # Fill gaps with zeros
-                row.append(0)
-        intensities.append(row)
+    # Serve the pre-serialized rolling spectrogram unless custom binning is asked for;
+    # clients sending the last ETag back get a 304 while nothing has changed
+    custom_binning = any(key in request.args for key in ('maxTimePoints', 'timeResolution', 'freqResolution'))
+    spectrogram = engine.spectrogram
+    snapshot = spectrogram.snapshot() if spectrogram and not custom_binning else None
+    if snapshot:
+        if encoding != 'json':
+            etag, payload = spectrogram.binary_snapshot(encoding)
+            response = binary_response(payload, encoding)
+        else:
+            etag, payload = snapshot
+            response = Response(payload, mimetype='application/json')
+            response.vary.add('Accept')
+        response.set_etag(etag)
+        return response.make_conditional(request)
+    
+    # Bin resolution and number of time points can be tuned per request
+    max_time_points = request.args.get('maxTimePoints', DEFAULT_MAX_TIME_POINTS, type=int)
+    time_resolution = request.args.get('timeResolution', None, type=float)
+    freq_resolution = request.args.get('freqResolution', None, type=float)
+    
+    freq_axis, time_axis, matrix = generate_spectrogram(max_time_points, time_resolution, freq_resolution)
+    if encoding != 'json':
+        return binary_response(encode_spectrogram(freq_axis, time_axis, matrix, encoding), encoding)
+    
+    freqs = freq_axis.tolist()
+    times = time_axis.tolist()
+    intensities = matrix.tolist()
     
     # Ensure we have at least some data in our intensities matrix
     if not intensities or not intensities[0]:
@@ -488,10 +746,60 @@ def get_spectrogram():
         "intensities": intensities
     })
 
+# Get detector status, including online refit latency and model swaps
+@app.route('/api/model-stats', methods=['GET'])
+def get_model_stats():
+    model = scoring_model
+    stats = {
+        "trained": is_model_trained,
+        "mode": model_mode(model)
+    }
+    if model_mode(model) == "online":
+        stats["online"] = model.stats()
+    stats["stream"] = event_broadcaster.stats()
+    if anomaly_history:
+        stats["history"] = anomaly_history.stats()
+    return jsonify(stats)
+
+# Prometheus metrics: per-stage latency histograms, throughput, queue depths,
+# dropped frames, model load time and buffer occupancy
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# Sample the detector's threads for ?seconds=N (default 5) and return the
+# hottest functions. Only available with RF_PROFILER=1; ?scope=all samples
+# every thread, including request handlers.
+@app.route('/api/profile', methods=['GET'])
+def get_profile():
+    if not PROFILER_ENABLED:
+        return jsonify({"error": "profiler disabled, set RF_PROFILER=1"}), 404
+    
+    seconds = min(request.args.get('seconds', 5.0, type=float), 60.0)
+    interval = max(request.args.get('interval', 0.005, type=float), 0.001)
+    top = request.args.get('top', 25, type=int)
+    threads = None
+    if request.args.get('scope', 'detector') != 'all':
+        pipeline = engine.pipeline
+        threads = [engine.thread, pipeline.producer if pipeline else None]
+    return jsonify(sample_profile(seconds, interval, top, threads))
+
 # Check for hardware
 @app.route('/api/check-hardware', methods=['GET'])
 def check_hardware():
-    sdr = init_rtlsdr() if RTL_SDR_AVAILABLE else None
+    # Report on the open stream rather than competing with it for the device
+    stream = sdr_stream
+    if stream:
+        hardware_info = {
+            "available": True,
+            "name": stream.source.name,
+            "sampleRate": stream.source.sample_rate / 1e6,  # MHz
+            "centerFreq": stream.source.center_freq / 1e6,  # MHz
+            "frequencyRange": [24, 1766]  # Typical RTL-SDR range
+        }
+        return jsonify(hardware_info)
+    
+    sdr = init_rtlsdr()
     
     if sdr:
         hardware_info = {
@@ -514,18 +822,19 @@ def check_hardware():
 # Clear all anomalies
 @app.route('/api/clear-anomalies', methods=['POST'])
 def clear_anomalies():
-    global anomaly_results
-    anomaly_results = []
+    engine.anomalies.clear()
     return jsonify({"status": "cleared"})
 
 if __name__ == '__main__':
     print("\n" + "="*80)
     print("RF Anomaly Detection Backend Server")
     print("="*80)
-    print("\nCreating sample dataset (if needed)...")
     
-    # Make sure we have a dataset
-    create_sample_dataset()
+    # The debug reloader runs this file twice; prepare the dataset and model
+    # only in the child process that serves requests
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        print("\nPreparing the sample dataset and model in the background...")
+        threading.Thread(target=warm_up, daemon=True).start()
     
     print("\nStarting the server on http://localhost:5000")
     print("To connect from the frontend, ensure your React app is running")
@@ -0,0 +1,98 @@
+# Benchmark for the persistent anomaly history.
+#
+# Fills a scratch database with synthetic anomalies spread over several weeks,
+# in batches as the writer thread would insert them, then times the query
+# endpoint's typical filters: latest page, time range, band, class, all
+# combined, and paging deep into a result set with the cursor.
+#
+#   python benchmarks/bench_anomaly_history.py [--rows 2000000] [--queries 50]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from anomaly_history import AnomalyHistory  # noqa: E402
+from scoring import ANOMALY_CLASSES  # noqa: E402
+
+SEED = 42
+WEEKS = 4
+BATCH_ROWS = 10000
+
+
+def fill(history, n_rows, rng):
+    now = time.time()
+    started = time.perf_counter()
+    for first in range(0, n_rows, BATCH_ROWS):
+        n = min(BATCH_ROWS, n_rows - first)
+        timestamps = np.sort(now - WEEKS * 7 * 86400 + (first + np.arange(n)) * (WEEKS * 7 * 86400 / n_rows))
+        frequencies = rng.uniform(24, 1766, n)
+        classes = ANOMALY_CLASSES[rng.randint(0, len(ANOMALY_CLASSES), n)]
+        history.write([
+            (f"anomaly-{t}-{i}", t, f, c, a, 1.0, 1, 0, cls)
+            for i, (t, f, c, a, cls) in enumerate(zip(
+                timestamps.tolist(), frequencies.tolist(), rng.uniform(0.5, 1, n).tolist(),
+                rng.uniform(-1, 2, n).tolist(), classes.tolist()
+            ))
+        ])
+    return now, time.perf_counter() - started
+
+
+def timed(history, queries, **filters):
+    samples = []
+    for _ in range(queries):
+        started = time.perf_counter()
+        rows, cursor = history.query(**filters)
+        samples.append(time.perf_counter() - started)
+    return np.array(samples) * 1000, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Anomaly history benchmark")
+    parser.add_argument('--rows', type=int, default=2000000)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--pages', type=int, default=100, help="pages walked in the pagination benchmark")
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(SEED)
+    with tempfile.TemporaryDirectory() as tmp:
+        history = AnomalyHistory(os.path.join(tmp, "history.sqlite3"))
+        now, elapsed = fill(history, args.rows, rng)
+        size = sum(os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp))
+        print(f"Inserted {args.rows} anomalies in {elapsed:.1f}s ({args.rows / elapsed:,.0f}/s), "
+              f"{size / 1e6:.0f} MB on disk")
+
+        day = 86400
+        cases = [
+            ("latest page", {}),
+            ("last hour", {"start": now - 3600}),
+            ("one day, a week ago", {"start": now - 8 * day, "end": now - 7 * day}),
+            ("FM band", {"min_frequency": 88, "max_frequency": 108}),
+            ("narrow band", {"min_frequency": 100, "max_frequency": 100.5}),
+            ("one class", {"classifications": ["Possible Aircraft Communication"]}),
+            ("class + band + week", {"classifications": ["High Power Transmission"], "min_frequency": 118,
+                                     "max_frequency": 137, "start": now - 7 * day}),
+        ]
+        print(f"{'query':>22} {'rows':>5} {'p50 ms':>8} {'p99 ms':>8}")
+        for name, filters in cases:
+            samples, n = timed(history, args.queries, **filters)
+            print(f"{name:>22} {n:>5} {np.percentile(samples, 50):>8.2f} {np.percentile(samples, 99):>8.2f}")
+
+        # Walk pages of the FM band; the last page should cost the same as the first
+        cursor, samples = None, []
+        for _ in range(args.pages):
+            started = time.perf_counter()
+            rows, cursor = history.query(min_frequency=88, max_frequency=108, cursor=cursor)
+            samples.append(time.perf_counter() - started)
+        samples = np.array(samples) * 1000
+        print(f"{args.pages} FM band pages: first {samples[0]:.2f} ms, last {samples[-1]:.2f} ms, "
+              f"mean {samples.mean():.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# Per-tick latency of dataset acquisition against dataset size.
+#
+# Compares the old get_rf_data path (parse the CSV, filter, unique + isin on
+# every tick) with the resident DatasetStore window lookup.
+#
+#   python benchmarks/bench_dataset_store.py [--sizes 10000 100000 1000000]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from dataset_store import DatasetStore  # noqa: E402
+
+FREQUENCY_RANGE = [80, 108]
+
+
+def make_dataset(path, n_rows, seed=42):
+    rng = np.random.RandomState(seed)
+    n_times = max(1, n_rows // 6)
+    df = pd.DataFrame({
+        'time': rng.choice(np.linspace(0, 10, n_times), size=n_rows),
+        'frequency': rng.choice([88.5, 91.7, 94.2, 95.3, 98.1, 102.5, 105.9], size=n_rows),
+        'amplitude': rng.normal(0, 1, size=n_rows),
+        'is_anomaly': (rng.uniform(size=n_rows) < 0.15).astype(int)
+    })
+    df.to_csv(path, index=False)
+
+
+def legacy_tick(path, config):
+    df = pd.read_csv(path)
+    df_filtered = df[(df['frequency'] >= config["frequencyRange"][0]) &
+                     (df['frequency'] <= config["frequencyRange"][1])]
+    times = df_filtered['time'].unique()
+    if len(times) == 0:
+        return []
+    random_start = np.random.randint(0, max(1, len(times) - 100))
+    selected_times = times[random_start:random_start + 100]
+    return df_filtered[df_filtered['time'].isin(selected_times)].to_dict('records')
+
+
+def store_tick(store, config):
+    return store.window(config["frequencyRange"], n_times=100)
+
+
+def time_ticks(fn, ticks):
+    samples = []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return np.median(samples) * 1e3, np.percentile(samples, 95) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--ticks', type=int, default=20)
+    args = parser.parse_args()
+
+    config = {"frequencyRange": FREQUENCY_RANGE}
+    print(f"{'rows':>10} {'legacy p50 ms':>14} {'legacy p95 ms':>14} {'store p50 ms':>13} {'store p95 ms':>13} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"rf_{size}.csv")
+            make_dataset(path, size)
+
+            store = DatasetStore(path)
+            store_tick(store, config)  # initial load is paid once, not per tick
+
+            legacy_ticks = max(3, args.ticks // 4) if size >= 1000000 else args.ticks
+            legacy_p50, legacy_p95 = time_ticks(lambda: legacy_tick(path, config), legacy_ticks)
+            store_p50, store_p95 = time_ticks(lambda: store_tick(store, config), args.ticks * 10)
+            print(f"{size:>10} {legacy_p50:>14.2f} {legacy_p95:>14.2f} {store_p50:>13.4f} {store_p95:>13.4f} {legacy_p50 / store_p50:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# Samples/sec of the anomaly scoring stage.
+#
+# Compares the old per-sample loop in process_signals (predict +
+# decision_function, then confidence, thresholding and classification in
+# Python) with scoring.score_batch / classify_anomalies. The last column is a
+# single score_samples call on its own, i.e. the ceiling set by the forest.
+#
+#   python benchmarks/bench_scoring.py [--batch-sizes 1000 10000 100000]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scoring import score_batch, classify_anomalies  # noqa: E402
+from signal_buffer import make_signals  # noqa: E402
+
+SENSITIVITY_THRESHOLD = 0.75
+
+
+def make_batch(n, rng):
+    return make_signals(
+        rng.uniform(0, 10, n),
+        rng.choice([88.5, 89.2, 91.7, 94.2, 95.3, 98.1, 102.5, 105.9], size=n),
+        rng.normal(0, 1, n) * rng.choice([1, 4], size=n, p=[0.95, 0.05]),
+        (rng.uniform(size=n) < 0.15).astype(np.int8)
+    )
+
+
+def features(batch):
+    return np.column_stack((batch['frequency'], batch['amplitude']))
+
+
+def legacy_classify(frequency, amplitude):
+    fm_stations = [88.1, 89.5, 91.3, 93.7, 95.5, 97.9, 99.3, 101.1, 103.5, 105.9, 107.7]
+    is_fm = any(abs(frequency - station) < 0.2 for station in fm_stations)
+    if amplitude > 1.5:
+        return "Unusually Strong FM Broadcast" if is_fm else "High Power Transmission"
+    if 0.5 < amplitude < 1.5 and not is_fm:
+        if 76 <= frequency <= 88:
+            return "Potential Public Service Communication"
+        elif 108 <= frequency <= 137:
+            return "Possible Aircraft Communication"
+        elif 88 <= frequency <= 108:
+            return "Non-standard FM Frequency"
+        return "Unknown Signal Source"
+    if amplitude < 0.5:
+        return "Low Power Covert Signal"
+    return "Unclassified Anomaly"
+
+
+# Both stages report every candidate, without rate limiting, so the work done
+# per sample is the same
+def legacy_stage(detector, batch):
+    records = [{'frequency': f, 'amplitude': a, 'is_anomaly': k} for f, a, k in
+               zip(batch['frequency'].tolist(), batch['amplitude'].tolist(), batch['is_anomaly'].tolist())]
+    X = np.array([[d['frequency'], d['amplitude']] for d in records])
+    predictions = detector.predict(X)
+    scores = detector.decision_function(X)
+    emitted = []
+    for i, (pred, score) in enumerate(zip(predictions, scores)):
+        is_dataset_anomaly = records[i]['is_anomaly'] == 1
+        if is_dataset_anomaly or pred == -1:
+            confidence = 1.0 - (score + 0.5) / 0.5 if not is_dataset_anomaly else 0.9
+            if is_dataset_anomaly or confidence > SENSITIVITY_THRESHOLD:
+                emitted.append((i, confidence, legacy_classify(records[i]['frequency'], records[i]['amplitude'])))
+    return emitted
+
+
+def vectorized_stage(detector, batch):
+    confidence, candidates = score_batch(detector, batch, SENSITIVITY_THRESHOLD)
+    emitted = np.flatnonzero(candidates)
+    classifications = classify_anomalies(batch['frequency'][emitted], batch['amplitude'][emitted])
+    return list(zip(emitted.tolist(), confidence[emitted].tolist(), classifications))
+
+
+def throughput(fn, batch, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(batch)
+        best = min(best, time.perf_counter() - start)
+    return len(batch) / best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(42)
+    train = make_batch(20000, rng)
+    detector = IsolationForest(contamination=0.05, random_state=42)
+    detector.fit(np.column_stack((train['frequency'], train['amplitude'])))
+
+    print(f"{'batch':>8} {'legacy samples/s':>17} {'vectorized samples/s':>21} {'speedup':>8} {'forest only samples/s':>22}")
+    for size in args.batch_sizes:
+        batch = make_batch(size, rng)
+        assert len(legacy_stage(detector, batch)) == len(vectorized_stage(detector, batch))
+        legacy = throughput(lambda b: legacy_stage(detector, b), batch, args.repeats)
+        vectorized = throughput(lambda b: vectorized_stage(detector, b), batch, args.repeats)
+        forest = throughput(lambda b: detector.score_samples(features(b)), batch, args.repeats)
+        print(f"{size:>8} {legacy:>17,.0f} {vectorized:>21,.0f} {vectorized / legacy:>7.1f}x {forest:>22,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# Throughput scaling of sharded sub-band detection.
+#
+# Fits a ShardedDetector with a fixed number of sub-bands, then scores the same
+# frames in-process and on pools of 1, 2, 4, ... worker processes (up to the
+# CPU count), printing samples/s and the speedup over in-process scoring.
+#
+# By default the frames are synthetic features over a wide band and every
+# frame goes to the pool. With --sdr they are the PSD frames SDR mode produces
+# (a recorded-noise IQ block through SDRStream, one row per frequency bin) and
+# the detector's real MIN_PARALLEL_ROWS threshold applies, as in app.py.
+#
+#   python benchmarks/bench_sharding.py [--frame-size 65536] [--frames 20] [--bands 8]
+#   python benchmarks/bench_sharding.py --sdr [--frames 20] [--bands 8]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sharded_detection import ShardedDetector, MIN_PARALLEL_ROWS  # noqa: E402
+
+FREQUENCY_RANGE = [80, 1000]
+
+# SDR mode settings: 2 MHz around 100 MHz, as sent to /api/start
+SDR_CONFIG = {"frequencyRange": [99, 101], "samplingRate": 2.4, "windowSize": 1024}
+
+
+def make_features(n, rng):
+    return np.column_stack((
+        rng.uniform(FREQUENCY_RANGE[0], FREQUENCY_RANGE[1], n),
+        rng.normal(0, 1, n)
+    ))
+
+
+# Features of `n_frames` PSD frames as SDRStream.read() returns them for a
+# replayed capture of complex noise
+def sdr_features(n_frames, rng):
+    from sdr_stream import SDRStream, IQFileSource, DEFAULT_BLOCK_SIZE
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "noise.cfile")
+        n = DEFAULT_BLOCK_SIZE * 4
+        (rng.normal(0, 0.1, n) + 1j * rng.normal(0, 0.1, n)).astype(np.complex64).tofile(path)
+
+        stream = SDRStream(IQFileSource(path, realtime=False))
+        frames = []
+        while len(frames) < n_frames:
+            signals = stream.read(SDR_CONFIG)
+            if len(signals):
+                frames.append(np.column_stack((signals['frequency'], signals['amplitude'])))
+        stream.close()
+    return frames
+
+
+def worker_counts(max_workers):
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frame-size', type=int, default=65536)
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--bands', type=int, default=8)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--sdr', action='store_true', help="score SDR PSD frames with the real pool threshold")
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(42)
+    if args.sdr:
+        frequency_range = SDR_CONFIG["frequencyRange"]
+        frames = sdr_features(args.frames + 2, rng)
+        train, frames = np.concatenate(frames[:2]), frames[2:]
+        min_parallel_rows = MIN_PARALLEL_ROWS
+        print(f"SDR PSD frames of {len(frames[0])} rows (pool used from {MIN_PARALLEL_ROWS} rows)")
+    else:
+        frequency_range = FREQUENCY_RANGE
+        train = make_features(200000, rng)
+        frames = [make_features(args.frame_size, rng) for _ in range(args.frames)]
+        min_parallel_rows = 0
+    n_samples = sum(len(frame) for frame in frames)
+
+    # Fit once; every run scores with the same band models
+    models = ShardedDetector(frequency_range, n_bands=args.bands, n_workers=0).fit_models(train)
+
+    print(f"{'workers':>8} {'bands':>6} {'samples/s':>14} {'speedup':>8}")
+    baseline = None
+    for workers in [0] + worker_counts(args.max_workers):
+        detector = ShardedDetector(frequency_range, n_bands=args.bands, n_workers=workers,
+                                   min_parallel_rows=min_parallel_rows)
+        detector.use_models(models)
+        detector.score_samples(frames[0])  # warm up the pool
+
+        start = time.perf_counter()
+        for frame in frames:
+            detector.score_samples(frame)
+        rate = n_samples / (time.perf_counter() - start)
+        detector.close()
+
+        baseline = baseline or rate
+        print(f"{workers or 'none':>8} {args.bands:>6} {rate:>14,.0f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# Import-time budget check for the server module.
+#
+# Imports app in fresh interpreters, several times, and fails if the median
+# import time exceeds the budget or if any of the heavy libraries that are
+# meant to load on first use (scikit-learn, scipy, pandas, joblib, matplotlib)
+# was imported along with it. Run it after touching imports:
+#
+#   python benchmarks/check_import_time.py [--budget 1.0] [--runs 5]
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Libraries that must not be imported by `import app`
+DEFERRED_MODULES = ('sklearn', 'scipy', 'pandas', 'joblib', 'matplotlib')
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [name for name in %r if name in sys.modules]}))
+""" % (DEFERRED_MODULES,)
+
+
+def measure():
+    result = subprocess.run([sys.executable, '-c', PROBE], cwd=SERVER_DIR, capture_output=True, text=True,
+                            timeout=120)
+    if result.returncode != 0:
+        sys.exit(f"import app failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budget check")
+    parser.add_argument('--budget', type=float, default=1.0, help="maximum median import time in seconds")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    # One unmeasured run first, so byte-compilation isn't counted
+    measure()
+    runs = [measure() for _ in range(args.runs)]
+    median = statistics.median(run["seconds"] for run in runs)
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+
+    print(f"import app: median {median:.3f}s over {args.runs} runs "
+          f"(min {min(run['seconds'] for run in runs):.3f}s, max {max(run['seconds'] for run in runs):.3f}s), "
+          f"budget {args.budget:.3f}s")
+    failures = []
+    if median > args.budget:
+        failures.append(f"median import time {median:.3f}s exceeds the {args.budget:.3f}s budget")
+    if loaded:
+        failures.append(f"imported at startup, should load on first use: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
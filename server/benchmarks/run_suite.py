@@ -0,0 +1,271 @@
+# Reproducible benchmark suite for the backend pipeline.
+#
+# Builds synthetic datasets of several sizes with the sample dataset generator
+# (fixed seed), then measures:
+#
+#   acquisition  per-tick latency of the dataset window lookup (get_rf_data)
+#   detector     model fit time and scoring throughput of score_batch
+#   spectrogram  /api/spectrogram latency (cached JSON, cached binary and
+#                on-demand binning) as the signal buffer grows
+#   api          latency and throughput of the read endpoints under 1..N
+#                concurrent clients while the detector runs, through the
+#                Flask test client
+#
+# Everything runs offline in a temporary directory. Results are written as a
+# JSON report of flat {benchmark, params, metric, value, unit} records; pass a
+# previous report with --compare to print the change of every metric.
+#
+#   python benchmarks/run_suite.py [--output report.json] [--compare old.json] [--quick]
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import sklearn
+from sklearn.ensemble import IsolationForest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import app as rf_app  # noqa: E402
+from dataset_generator import SampleDatasetPlan, write_dataset, binary_path_for  # noqa: E402
+from dataset_store import DatasetStore  # noqa: E402
+from engine import DetectionEngine  # noqa: E402
+from model_store import ModelStore  # noqa: E402
+from scoring import score_batch  # noqa: E402
+from spectrogram import RollingSpectrogram  # noqa: E402
+
+SEED = 42
+FREQUENCY_RANGE = [80, 108]
+CONFIG = {
+    "frequencyRange": FREQUENCY_RANGE,
+    "sensitivityThreshold": 0.75,
+    "samplingRate": 2.4,
+    "windowSize": 1024,
+    "tickInterval": 0
+}
+
+
+class Report:
+    def __init__(self):
+        self.records = []
+
+    def add(self, benchmark, params, metric, value, unit):
+        self.records.append({"benchmark": benchmark, "params": params, "metric": metric,
+                             "value": float(value), "unit": unit})
+        label = ",".join(f"{key}={value}" for key, value in params.items())
+        print(f"  {benchmark:<12} {label:<28} {metric:<16} {value:>12.4f} {unit}")
+
+
+def percentiles(samples):
+    samples = np.asarray(samples) * 1e3
+    return np.percentile(samples, 50), np.percentile(samples, 99), samples.mean()
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=10,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def build_dataset(directory, n_points):
+    path = os.path.join(directory, f"rf_{n_points}.csv")
+    rows = write_dataset(SampleDatasetPlan(n_points, seed=SEED), path, binary_path_for(path))
+    return path, rows
+
+
+def bench_acquisition(report, store, rows, ticks):
+    rng = np.random.RandomState(SEED)
+    store.window(FREQUENCY_RANGE, rng=rng)  # Initial load is paid once, not per tick
+    samples = []
+    for _ in range(ticks):
+        started = time.perf_counter()
+        store.window(FREQUENCY_RANGE, n_times=100, rng=rng)
+        samples.append(time.perf_counter() - started)
+    p50, p99, mean = percentiles(samples)
+    params = {"rows": rows}
+    report.add("acquisition", params, "tick_p50", p50, "ms")
+    report.add("acquisition", params, "tick_p99", p99, "ms")
+
+
+def bench_detector(report, store, rows, frames):
+    data = store.rows()
+    features = np.column_stack((data['frequency'], data['amplitude']))
+    started = time.perf_counter()
+    model = IsolationForest(**rf_app.MODEL_PARAMS).fit(features)
+    report.add("detector", {"rows": rows}, "fit", time.perf_counter() - started, "s")
+
+    rng = np.random.RandomState(SEED)
+    batches = [store.window(FREQUENCY_RANGE, n_times=100, rng=rng) for _ in range(frames)]
+    started = time.perf_counter()
+    for batch in batches:
+        score_batch(model, batch, CONFIG["sensitivityThreshold"])
+    elapsed = time.perf_counter() - started
+    report.add("detector", {"rows": rows}, "throughput", sum(len(b) for b in batches) / elapsed, "samples/s")
+
+
+def bench_spectrogram(report, store, capacities, requests):
+    rng = np.random.RandomState(SEED)
+    client = rf_app.app.test_client()
+    variants = [
+        ("cached_json", {}, {}),
+        ("cached_float32", {}, {'Accept': 'application/x-rf-float32'}),
+        ("on_demand", {'maxTimePoints': 50}, {})
+    ]
+    for capacity in capacities:
+        engine = DetectionEngine(CONFIG, capacity, 100)
+        engine.spectrogram = RollingSpectrogram(FREQUENCY_RANGE)
+        while len(engine.signals) < capacity:
+            frame = store.window(FREQUENCY_RANGE, n_times=100, rng=rng)
+            engine.spectrogram.update(frame['time'], frame['frequency'], frame['amplitude'])
+            engine.signals.append(frame)
+        rf_app.engine = engine
+
+        for name, query, headers in variants:
+            samples = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                client.get('/api/spectrogram', query_string=query, headers=headers)
+                samples.append(time.perf_counter() - started)
+            p50, p99, mean = percentiles(samples)
+            report.add("spectrogram", {"buffer": capacity, "variant": name}, "p50", p50, "ms")
+            report.add("spectrogram", {"buffer": capacity, "variant": name}, "p99", p99, "ms")
+
+
+def api_client(deadline, latencies, lock):
+    client = rf_app.app.test_client()
+    endpoints = ['/api/signals', '/api/anomalies', '/api/spectrogram', '/api/model-stats']
+    local = []
+    while time.time() < deadline:
+        for endpoint in endpoints:
+            started = time.perf_counter()
+            client.get(endpoint)
+            local.append(time.perf_counter() - started)
+    with lock:
+        latencies.extend(local)
+
+
+def bench_api(report, dataset_path, model_dir, history_path, client_counts, duration):
+    # Point the app at the synthetic dataset, a scratch model cache and a
+    # scratch anomaly history
+    rf_app.DATASET_PATH = dataset_path
+    rf_app.dataset_store = DatasetStore(dataset_path)
+    rf_app.model_store = ModelStore(model_dir)
+    rf_app.ANOMALY_HISTORY_PATH = history_path
+    rf_app.anomaly_history = None
+    rf_app.engine = DetectionEngine(CONFIG, rf_app.SIGNAL_BUFFER_CAPACITY, rf_app.ANOMALY_BUFFER_CAPACITY)
+
+    client = rf_app.app.test_client()
+    client.post('/api/start', json=CONFIG)
+    while len(rf_app.engine.signals) < 50:
+        time.sleep(0.05)
+
+    for clients in client_counts:
+        latencies, lock = [], threading.Lock()
+        ticks_before = rf_app.engine.tick
+        deadline = time.time() + duration
+        threads = [threading.Thread(target=api_client, args=(deadline, latencies, lock)) for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        p50, p99, mean = percentiles(latencies)
+        params = {"clients": clients}
+        report.add("api", params, "requests_per_s", len(latencies) / duration, "req/s")
+        report.add("api", params, "p50", p50, "ms")
+        report.add("api", params, "p99", p99, "ms")
+        report.add("api", params, "detector_ticks_per_s", (rf_app.engine.tick - ticks_before) / duration, "ticks/s")
+
+    client.post('/api/stop')
+    time.sleep(0.5)
+
+
+# Print the relative change of every metric present in both reports
+def compare(report, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def key(record):
+        return record["benchmark"], json.dumps(record["params"], sort_keys=True), record["metric"]
+
+    previous = {key(record): record["value"] for record in baseline["results"]}
+    print(f"\nChange against {baseline_path} (commit {baseline['meta'].get('commit')}):")
+    for record in report.records:
+        old = previous.get(key(record))
+        if old is None:
+            continue
+        change = (record["value"] - old) / old * 100 if old else float('nan')
+        print(f"  {record['benchmark']:<12} {key(record)[1]:<40} {record['metric']:<20} "
+              f"{old:>12.4f} -> {record['value']:>12.4f} {record['unit']:<10} {change:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend benchmark suite")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 50000, 500000],
+                        help="time points per synthetic dataset")
+    parser.add_argument('--buffers', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="signal buffer capacities for the spectrogram benchmark")
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--ticks', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=5.0, help="seconds per API client count")
+    parser.add_argument('--quick', action='store_true', help="small sizes and short runs, for smoke testing")
+    parser.add_argument('--output', default=None, help="report path (default: bench-<timestamp>.json)")
+    parser.add_argument('--compare', default=None, help="previous report to compare against")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.sizes, args.buffers, args.clients = [5000, 20000], [1000, 10000], [1, 4]
+        args.ticks, args.requests, args.duration = 50, 20, 1.0
+
+    np.random.seed(SEED)
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    report = Report()
+    with tempfile.TemporaryDirectory() as tmp:
+        datasets = []
+        for n_points in args.sizes:
+            path, rows = build_dataset(tmp, n_points)
+            store = DatasetStore(path)
+            bench_acquisition(report, store, rows, args.ticks)
+            bench_detector(report, store, rows, max(10, args.ticks // 10))
+            datasets.append((path, store))
+
+        bench_spectrogram(report, datasets[-1][1], args.buffers, args.requests)
+        bench_api(report, datasets[0][0], os.path.join(tmp, "models"), os.path.join(tmp, "anomaly_history.sqlite3"),
+                  args.clients, args.duration)
+
+    output = {
+        "meta": {
+            "started": started_at.isoformat(),
+            "commit": git_commit(),
+            "seed": SEED,
+            "args": vars(args),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "sklearn": sklearn.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "results": report.records
+    }
+    path = args.output or f"bench-{started_at.strftime('%Y%m%dT%H%M%S')}.json"
+    with open(path, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"\nWrote {len(report.records)} results to {path}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+# Stress test for the shared detector state.
+#
+# Runs the detector on the sample dataset at full rate while client threads
+# hammer the read endpoints and keep sending new configs and stop/start
+# pairs. Every response is checked for internal consistency (consecutive
+# sequence numbers, spectrogram shapes matching their axes, binary bodies
+# matching their headers). Afterwards it checks that stopping really stops
+# processing, i.e. that no stale processing thread kept running. Prints
+# per-endpoint latency and exits non-zero if any check failed.
+#
+#   python benchmarks/stress_engine.py [--clients 16] [--duration 10]
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import app as rf_app  # noqa: E402
+from engine import freeze_config  # noqa: E402
+from wire_format import SPECTROGRAM_HEADER, SIGNALS_HEADER  # noqa: E402
+
+CONFIGS = [
+    {"frequencyRange": [80, 108], "sensitivityThreshold": 0.75, "samplingRate": 2.4, "windowSize": 1024,
+     "tickInterval": 0},
+    {"frequencyRange": [88, 100], "sensitivityThreshold": 0.5, "samplingRate": 2.4, "windowSize": 1024,
+     "tickInterval": 0}
+]
+
+
+class Results:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.failures = []
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self.lock:
+            self.latencies[name].append(seconds)
+
+    def fail(self, message):
+        with self.lock:
+            if len(self.failures) < 20:
+                print(f"FAIL: {message}")
+            self.failures.append(message)
+
+
+def check_signals(client, cursor, results):
+    body = client.get('/api/signals', query_string={'since': cursor}).get_json()
+    seqs = [signal['seq'] for signal in body['signals']]
+    if seqs and seqs != list(range(seqs[0], seqs[0] + len(seqs))):
+        results.fail(f"signal sequence numbers not consecutive: {seqs[:5]}...")
+    if seqs and (seqs[0] <= cursor or body['lastSeq'] != seqs[-1]):
+        results.fail(f"signals after {cursor} start at {seqs[0]}, lastSeq {body['lastSeq']}")
+    return body['lastSeq']
+
+
+def check_anomalies(client, results):
+    anomalies = client.get('/api/anomalies').get_json()['anomalies']
+    seqs = [anomaly['seq'] for anomaly in anomalies]
+    if seqs and seqs != list(range(seqs[0], seqs[0] - len(seqs), -1)):
+        results.fail(f"anomaly sequence numbers not consecutive: {seqs[:5]}...")
+
+
+def check_spectrogram(client, results):
+    body = json.loads(client.get('/api/spectrogram').data)
+    n_freqs = len(body['frequencies'])
+    if len(body['intensities']) != len(body['timePoints']) or any(len(row) != n_freqs for row in body['intensities']):
+        results.fail("spectrogram matrix does not match its axes")
+
+
+def check_binary(client, results):
+    data = client.get('/api/spectrogram', headers={'Accept': 'application/x-rf-uint8'}).data
+    header = SPECTROGRAM_HEADER.unpack_from(data)
+    n_times, n_freqs = header[4], header[5]
+    if len(data) != SPECTROGRAM_HEADER.size + 8 * n_times + 4 * n_freqs + n_times * n_freqs:
+        results.fail(f"binary spectrogram of {len(data)} bytes does not match {n_times}x{n_freqs}")
+
+    data = client.get('/api/signals', headers={'Accept': 'application/x-rf-float32'}).data
+    n = SIGNALS_HEADER.unpack_from(data)[4]
+    if len(data) != SIGNALS_HEADER.size + 17 * n:
+        results.fail(f"binary signals of {len(data)} bytes do not match {n} rows")
+
+
+def reader(deadline, results):
+    client = rf_app.app.test_client()
+    cursor = 0
+    checks = [
+        ('signals', lambda: check_signals(client, cursor, results)),
+        ('anomalies', lambda: check_anomalies(client, results)),
+        ('spectrogram', lambda: check_spectrogram(client, results)),
+        ('binary', lambda: check_binary(client, results)),
+        ('model-stats', lambda: client.get('/api/model-stats'))
+    ]
+    while time.time() < deadline:
+        for name, check in checks:
+            started = time.perf_counter()
+            try:
+                outcome = check()
+            except Exception as e:
+                results.fail(f"{name}: {e!r}")
+                continue
+            results.record(name, time.perf_counter() - started)
+            if name == 'signals':
+                cursor = outcome
+
+
+def controller(deadline, results, churn):
+    client = rf_app.app.test_client()
+    i = 0
+    while time.time() < deadline:
+        i += 1
+        started = time.perf_counter()
+        client.post('/api/start', json=CONFIGS[i % len(CONFIGS)])
+        results.record('start', time.perf_counter() - started)
+        if churn and i % 10 == 0:
+            client.post('/api/stop')
+            client.post('/api/start', json=CONFIGS[i % len(CONFIGS)])
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--no-churn', action='store_true', help="don't interleave stop/start calls")
+    args = parser.parse_args()
+
+    # Keep the synthetic anomalies out of the persistent history
+    rf_app.ANOMALY_HISTORY_PATH = ''
+    rf_app.anomaly_history = None
+
+    rf_app.create_sample_dataset()
+    client = rf_app.app.test_client()
+    client.post('/api/start', json=CONFIGS[0])
+    while len(rf_app.engine.signals) < 50:
+        time.sleep(0.05)
+
+    results = Results()
+    deadline = time.time() + args.duration
+    threads = [threading.Thread(target=reader, args=(deadline, results)) for _ in range(args.clients)]
+    threads.append(threading.Thread(target=controller, args=(deadline, results, not args.no_churn)))
+    ticks_before = rf_app.engine.tick
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ticks = rf_app.engine.tick - ticks_before
+
+    if rf_app.engine.config not in [freeze_config(config) for config in CONFIGS]:
+        results.fail(f"active config {dict(rf_app.engine.config)} is none of the configs sent")
+
+    # Once stopped, nothing may keep appending
+    client.post('/api/stop')
+    time.sleep(1.0)
+    seq = rf_app.engine.signals.last_seq
+    time.sleep(1.0)
+    if rf_app.engine.signals.last_seq != seq:
+        results.fail("samples still arriving after /api/stop")
+
+    print(f"{args.clients} clients for {args.duration:.0f}s, {ticks} detector ticks ({ticks / args.duration:.1f}/s)")
+    print(f"{'endpoint':>12} {'requests':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, latencies in sorted(results.latencies.items()):
+        latencies = np.array(latencies) * 1000
+        print(f"{name:>12} {len(latencies):>9} {np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 99):>8.2f}")
+    print(f"{len(results.failures)} failed checks")
+    sys.exit(1 if results.failures else 0)
+
+
+if __name__ == '__main__':
+    main()
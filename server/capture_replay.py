@@ -0,0 +1,203 @@
+import os
+import time
+
+import numpy as np
+
+from signal_buffer import SIGNAL_DTYPE, empty_signals
+
+# Rows per block of the frequency summary; also the unit the capture is
+# mapped in, so it bounds how much of the file one frame touches
+DEFAULT_BLOCK_ROWS = 65536
+
+# Seconds of capture time returned per frame
+DEFAULT_FRAME_SECONDS = 0.5
+
+# Per-block time span and frequency extent of a capture
+SUMMARY_DTYPE = np.dtype([
+    ('first_time', 'f8'),
+    ('last_time', 'f8'),
+    ('min_frequency', 'f8'),
+    ('max_frequency', 'f8')
+])
+
+
+# Byte offset of the first record and number of records in a capture. .npy
+# files must hold a 1-D SIGNAL_DTYPE array; anything else is read as raw
+# SIGNAL_DTYPE records.
+def capture_layout(path):
+    if os.path.splitext(path)[1].lower() == '.npy':
+        data = np.load(path, mmap_mode='r')
+        if data.dtype != SIGNAL_DTYPE or data.ndim != 1:
+            raise ValueError(f"{path} holds {data.dtype} {data.shape}, expected a 1-D {SIGNAL_DTYPE} array")
+        return data.offset, len(data)
+
+    size = os.path.getsize(path)
+    if size % SIGNAL_DTYPE.itemsize:
+        raise ValueError(f"{path} is not a whole number of {SIGNAL_DTYPE.itemsize}-byte records")
+    return 0, size // SIGNAL_DTYPE.itemsize
+
+
+# Sidecar file the block summary of a capture is cached in
+def summary_path_for(path, block_rows=DEFAULT_BLOCK_ROWS):
+    return f"{path}.blocks{block_rows}.npy"
+
+
+# Summarize a capture block by block. Each block is mapped, read and unmapped
+# in turn, so the scan's memory use does not depend on the file size. Also
+# checks that the capture is sorted by time.
+def build_block_summary(path, offset, n_rows, block_rows=DEFAULT_BLOCK_ROWS):
+    n_blocks = -(-n_rows // block_rows)
+    summary = np.empty(n_blocks, dtype=SUMMARY_DTYPE)
+    previous = -np.inf
+    for block in range(n_blocks):
+        start = block * block_rows
+        rows = np.memmap(path, dtype=SIGNAL_DTYPE, mode='r', offset=offset + start * SIGNAL_DTYPE.itemsize,
+                         shape=(min(block_rows, n_rows - start),))
+        times = rows['time']
+        if times[0] < previous or np.any(times[1:] < times[:-1]):
+            raise ValueError(f"{path} is not sorted by time (block {block})")
+        summary[block] = (times[0], times[-1], rows['frequency'].min(), rows['frequency'].max())
+        previous = times[-1]
+        del rows, times
+    return summary
+
+
+# Block summary from the sidecar if it is newer than the capture, otherwise
+# built and saved for next time
+def load_block_summary(path, offset, n_rows, block_rows=DEFAULT_BLOCK_ROWS):
+    summary_path = summary_path_for(path, block_rows)
+    if os.path.exists(summary_path) and os.path.getmtime(summary_path) >= os.path.getmtime(path):
+        try:
+            summary = np.load(summary_path)
+            if summary.dtype == SUMMARY_DTYPE and len(summary) == -(-n_rows // block_rows):
+                return summary
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable capture summary {summary_path}: {e}")
+
+    started = time.perf_counter()
+    summary = build_block_summary(path, offset, n_rows, block_rows)
+    print(f"Summarized {n_rows} capture rows in {len(summary)} blocks in {time.perf_counter() - started:.1f}s")
+    try:
+        tmp_path = f"{summary_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, summary)
+        os.replace(tmp_path, summary_path)
+    except OSError as e:
+        print(f"Could not save capture summary: {e}")
+    return summary
+
+
+# Replay of a recorded, time-sorted capture of SIGNAL_DTYPE rows that can be
+# far larger than memory.
+#
+# The capture is walked frame by frame, each frame covering `frame_seconds` of
+# capture time. Only the blocks a frame spans are memory mapped, and only for
+# the duration of the read, so resident memory stays flat however large the
+# file is. Blocks whose summarized frequency extent misses the requested range
+# are skipped without being touched. Gaps longer than a frame are jumped over.
+#
+# With `realtime` set, frames are paced to capture time (scaled by `speed`);
+# otherwise they return as fast as the disk allows. At the end of the capture
+# the replay starts over if `loop` is set and returns empty frames otherwise.
+class CaptureReplay:
+    name = "Capture replay"
+
+    def __init__(self, path, frame_seconds=DEFAULT_FRAME_SECONDS, realtime=True, speed=1.0,
+                 block_rows=DEFAULT_BLOCK_ROWS, loop=True):
+        self.path = path
+        self.frame_seconds = frame_seconds
+        self.realtime = realtime
+        self.speed = speed
+        self.block_rows = block_rows
+        self.loop = loop
+
+        self._offset, self.n_rows = capture_layout(path)
+        self.summary = load_block_summary(path, self._offset, self.n_rows, block_rows)
+        self.position = 0
+        self.cursor_time = self.start_time
+        self.frames_read = 0
+        self._deadline = None
+
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def start_time(self):
+        return float(self.summary['first_time'][0]) if len(self.summary) else 0.0
+
+    @property
+    def end_time(self):
+        return float(self.summary['last_time'][-1]) if len(self.summary) else 0.0
+
+    # Map rows [start, stop) of the capture
+    def _map(self, start, stop):
+        return np.memmap(self.path, dtype=SIGNAL_DTYPE, mode='r',
+                         offset=self._offset + start * SIGNAL_DTYPE.itemsize, shape=(stop - start,))
+
+    # Index of the first row with time >= `timestamp`, reading only one block
+    def _row_at(self, timestamp):
+        block = int(np.searchsorted(self.summary['last_time'], timestamp, side='left'))
+        if block >= len(self.summary):
+            return self.n_rows
+        start = block * self.block_rows
+        times = self._map(start, min(start + self.block_rows, self.n_rows))['time']
+        return start + int(np.searchsorted(times, timestamp, side='left'))
+
+    def _time_at(self, row):
+        return float(self._map(row, row + 1)['time'][0])
+
+    # Continue the replay from the first row at or after `timestamp`
+    def seek(self, timestamp):
+        timestamp = max(float(timestamp), self.start_time)
+        self.position = self._row_at(timestamp)
+        self.cursor_time = timestamp
+        self._deadline = None
+
+    # Rows of the next frame whose frequency lies inside `frequency_range`
+    def read(self, frequency_range):
+        if self.position >= self.n_rows:
+            if not self.loop or self.n_rows == 0:
+                return empty_signals(0)
+            self.seek(self.start_time)
+
+        # Jump over gaps in the recording rather than replaying silence
+        next_time = self._time_at(self.position)
+        if next_time >= self.cursor_time + self.frame_seconds:
+            self.cursor_time = next_time
+
+        frame_end = self.cursor_time + self.frame_seconds
+        start, stop = self.position, self._row_at(frame_end)
+
+        low, high = float(frequency_range[0]), float(frequency_range[1])
+        first_block, last_block = start // self.block_rows, (stop - 1) // self.block_rows
+        blocks = self.summary[first_block:last_block + 1]
+        overlapping = (blocks['max_frequency'] >= low) & (blocks['min_frequency'] <= high)
+
+        parts = []
+        for block in (first_block + np.flatnonzero(overlapping)).tolist():
+            rows = self._map(max(start, block * self.block_rows), min(stop, (block + 1) * self.block_rows))
+            parts.append(rows[(rows['frequency'] >= low) & (rows['frequency'] <= high)])
+            del rows
+        frame = np.concatenate(parts) if parts else empty_signals(0)
+
+        self.position = stop
+        self.cursor_time = frame_end
+        self.frames_read += 1
+
+        if self.realtime:
+            now = time.monotonic()
+            self._deadline = max(self._deadline or now, now - 1.0) + self.frame_seconds / self.speed
+            if self._deadline > now:
+                time.sleep(self._deadline - now)
+        return frame
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "rows": self.n_rows,
+            "position": self.position,
+            "captureTime": self.cursor_time,
+            "startTime": self.start_time,
+            "endTime": self.end_time,
+            "framesRead": self.frames_read
+        }
@@ -0,0 +1,164 @@
+import argparse
+import os
+
+import numpy as np
+
+from signal_buffer import SIGNAL_DTYPE, make_signals
+
+FM_FREQUENCIES = [88.5, 91.7, 95.3, 98.1, 102.5, 105.9]
+HOP_FREQUENCIES = [89.2, 93.4, 97.8, 104.3]
+SPY_FREQUENCY = 94.2  # An unusual frequency
+
+POINTS_PER_SECOND = 500  # 5000 points over 10 seconds, like the original sample dataset
+FM_STRIDE = 5  # Every 5th time point of each FM carrier is kept
+HOP_STRIDE = 20  # The hopper is sampled every 20th point...
+HOP_DWELL = 100  # ...and changes frequency every 100 points
+SPY_STRIDE = 10
+BURST_LENGTH = 5
+BURSTS_PER_POINT = 20 / 5000
+TARGET_ANOMALY_PERCENT = 0.15
+
+DEFAULT_CHUNK_POINTS = 200000
+
+
+# Plan for a synthetic RF dataset of `n_points` time points.
+#
+# Every random choice that spans chunks (carrier amplitudes and phases, the hop
+# sequence, burst placement, the spy transmitter's quota) is drawn up front, so
+# the dataset can be produced one chunk of time points at a time and its row
+# count is known before anything is written. Within a chunk each signal family
+# is produced as whole arrays.
+class SampleDatasetPlan:
+    def __init__(self, n_points=5000, duration=None, seed=None):
+        self.n_points = n_points
+        self.duration = duration if duration is not None else n_points / POINTS_PER_SECOND
+        self.step = self.duration / max(1, n_points - 1)
+        self.rng = np.random.RandomState(seed)
+        rng = self.rng
+
+        self.fm_amplitudes = rng.uniform(0.5, 1.0, len(FM_FREQUENCIES))
+        self.fm_phases = rng.uniform(0, 2 * np.pi, len(FM_FREQUENCIES))
+        self.hop_sequence = rng.choice(HOP_FREQUENCIES, size=(n_points + HOP_DWELL - 1) // HOP_DWELL)
+
+        n_bursts = min(n_points, max(1, int(round(n_points * BURSTS_PER_POINT))))
+        self.burst_starts = np.sort(rng.choice(n_points, size=n_bursts, replace=False))
+        self.burst_frequencies = rng.uniform(90, 100, n_bursts)
+
+        # Top the anomalies up to ~15% of the dataset with the spy transmission
+        self.normal_count = len(FM_FREQUENCIES) * len(range(0, n_points, FM_STRIDE))
+        burst_rows = int(np.minimum(BURST_LENGTH, n_points - self.burst_starts).sum())
+        anomaly_count = len(range(0, n_points, HOP_STRIDE)) + burst_rows
+        more_needed = int((self.normal_count * TARGET_ANOMALY_PERCENT) / (1 - TARGET_ANOMALY_PERCENT)) - anomaly_count
+        self.spy_count = min(max(0, more_needed), len(range(0, n_points, SPY_STRIDE)))
+        self.anomaly_count = anomaly_count + self.spy_count
+
+    @property
+    def total_rows(self):
+        return self.normal_count + self.anomaly_count
+
+    # Rows for time points [start, stop), sorted by (time, frequency)
+    def chunk(self, start, stop):
+        rng = self.rng
+        parts = []
+
+        # FM radio stations - carriers with slow FM modulation
+        idx = np.arange(start + (-start) % FM_STRIDE, stop, FM_STRIDE)
+        t = idx * self.step
+        modulator = np.sin(2 * np.pi * 0.1 * t)
+        for freq, amplitude, phase in zip(FM_FREQUENCIES, self.fm_amplitudes, self.fm_phases):
+            noise = rng.normal(0, 0.05, len(t))
+            parts.append(make_signals(t, freq, amplitude * np.sin(2 * np.pi * freq * t + phase + 0.5 * modulator) + noise, 0))
+
+        # Frequency hopping signal (potentially malicious)
+        idx = np.arange(start + (-start) % HOP_STRIDE, stop, HOP_STRIDE)
+        t = idx * self.step
+        hop = self.hop_sequence[idx // HOP_DWELL]
+        amplitude = rng.uniform(0.2, 0.4, len(t))
+        parts.append(make_signals(t, hop, amplitude * np.sin(2 * np.pi * hop * t) + rng.normal(0, 0.02, len(t)), 1))
+
+        # High-power bursts (potentially jamming), BURST_LENGTH points each
+        burst_idx = self.burst_starts[:, None] + np.arange(BURST_LENGTH)
+        burst_freq = np.broadcast_to(self.burst_frequencies[:, None], burst_idx.shape)
+        in_chunk = (burst_idx >= start) & (burst_idx < stop)
+        idx = burst_idx[in_chunk]
+        parts.append(make_signals(idx * self.step, burst_freq[in_chunk], rng.uniform(3, 5, len(idx)), 1))
+
+        # Spy transmission (continuous low power with slight frequency drift)
+        idx = np.arange(start + (-start) % SPY_STRIDE, min(stop, self.spy_count * SPY_STRIDE), SPY_STRIDE)
+        parts.append(make_signals(
+            idx * self.step,
+            SPY_FREQUENCY + rng.normal(0, 0.05, len(idx)),
+            rng.uniform(0.3, 0.5, len(idx)),
+            1
+        ))
+
+        rows = np.concatenate(parts)
+        return rows[np.lexsort((rows['frequency'], rows['time']))]
+
+    def chunks(self, chunk_points=DEFAULT_CHUNK_POINTS):
+        for start in range(0, self.n_points, chunk_points):
+            yield self.chunk(start, min(start + chunk_points, self.n_points))
+
+
+# Path of the binary columnar copy that sits next to a CSV dataset
+def binary_path_for(csv_path):
+    return os.path.splitext(csv_path)[0] + '.npy'
+
+
+# Stream a planned dataset to disk chunk by chunk, so datasets larger than
+# memory can be produced. Writes the CSV and/or a .npy structured array (opened
+# as a memory map while writing) sorted by time. Returns the row count.
+def write_dataset(plan, csv_path=None, npy_path=None, chunk_points=DEFAULT_CHUNK_POINTS):
+    outputs = [path for path in (csv_path, npy_path) if path]
+    tmp_paths = {path: f"{path}.{os.getpid()}.tmp" for path in outputs}
+
+    binary = None
+    if npy_path:
+        binary = np.lib.format.open_memmap(tmp_paths[npy_path], mode='w+', dtype=SIGNAL_DTYPE, shape=(plan.total_rows,))
+    text = open(tmp_paths[csv_path], 'w') if csv_path else None
+    if text:
+        import pandas as pd  # Only the CSV output needs pandas; importing it is slow
+
+    written = 0
+    try:
+        if text:
+            text.write("time,frequency,amplitude,is_anomaly\n")
+        for rows in plan.chunks(chunk_points):
+            if binary is not None:
+                binary[written:written + len(rows)] = rows
+            if text:
+                pd.DataFrame(rows).to_csv(text, header=False, index=False)
+            written += len(rows)
+    finally:
+        if text:
+            text.close()
+        if binary is not None:
+            binary.flush()
+            del binary
+
+    for path in outputs:
+        os.replace(tmp_paths[path], path)
+    # Loaders prefer the binary copy only while it is at least as new as the CSV
+    if npy_path:
+        os.utime(npy_path)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic RF signals dataset")
+    parser.add_argument('output', help="CSV path; a .npy copy is written next to it")
+    parser.add_argument('--points', type=int, default=5000, help="time points to generate")
+    parser.add_argument('--duration', type=float, default=None, help="seconds covered (default: points / 500)")
+    parser.add_argument('--chunk-points', type=int, default=DEFAULT_CHUNK_POINTS)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--no-csv', action='store_true', help="only write the binary copy")
+    args = parser.parse_args()
+
+    plan = SampleDatasetPlan(args.points, args.duration, args.seed)
+    csv_path = None if args.no_csv else args.output
+    rows = write_dataset(plan, csv_path, binary_path_for(args.output), args.chunk_points)
+    print(f"Wrote {rows} rows - {plan.anomaly_count} anomalies ({plan.anomaly_count / rows * 100:.1f}%)")
+
+
+if __name__ == '__main__':
+    main()
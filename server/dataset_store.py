@@ -0,0 +1,155 @@
+import os
+import threading
+
+import numpy as np
+
+from signal_buffer import SIGNAL_DTYPE, make_signals
+
+
+# Resident, columnar copy of the RF dataset.
+#
+# If a binary copy (<name>.npy, written by dataset_generator) sits next to the
+# CSV and is at least as new, it is opened as a memory map and no text is
+# parsed at all. Otherwise the CSV is parsed once into a structured array (see
+# signal_buffer.SIGNAL_DTYPE). Rows are sorted by time, and the source is only
+# re-read when its mtime changes. For every frequency range that is
+# requested we keep a filtered view together with a time index (the row offset
+# where each unique timestamp starts), so choosing a window of consecutive
+# timestamps is a pair of index lookups instead of a full scan.
+class DatasetStore:
+    def __init__(self, path, max_cached_ranges=8):
+        self.path = path
+        self.binary_path = os.path.splitext(path)[0] + '.npy'
+        self.source_path = None
+        self.max_cached_ranges = max_cached_ranges
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._rows = None
+        self._views = {}
+
+    # The file rows are loaded from: the binary copy if it is current, else the CSV
+    def _current_source(self):
+        if os.path.exists(self.binary_path):
+            if not os.path.exists(self.path) or os.path.getmtime(self.binary_path) >= os.path.getmtime(self.path):
+                return self.binary_path
+        return self.path
+
+    # Re-read the file if it changed on disk since the last load
+    def _refresh(self):
+        source = self._current_source()
+        mtime = os.path.getmtime(source)
+        if self._rows is not None and (source, mtime) == (self.source_path, self._mtime):
+            return
+
+        if source == self.binary_path:
+            rows = np.load(source, mmap_mode='r')
+            if rows.dtype != SIGNAL_DTYPE:
+                raise ValueError(f"{source} has dtype {rows.dtype}, expected {SIGNAL_DTYPE}")
+            # Generated files are already time sorted; anything else is sorted in memory
+            if len(rows) > 1 and np.any(rows['time'][1:] < rows['time'][:-1]):
+                rows = rows[np.argsort(rows['time'], kind='stable')]
+        else:
+            import pandas as pd  # Only CSV sources need pandas; importing it is slow
+            df = pd.read_csv(source)
+            time_col = df['time'].to_numpy(dtype=np.float64)
+            freq_col = df['frequency'].to_numpy(dtype=np.float64)
+            order = np.lexsort((freq_col, time_col))
+            rows = make_signals(
+                time_col[order],
+                freq_col[order],
+                df['amplitude'].to_numpy(dtype=np.float64)[order],
+                df['is_anomaly'].to_numpy(dtype=np.int8)[order]
+            )
+
+        if rows.flags.writeable:
+            rows.flags.writeable = False
+        self._rows = rows
+        self.source_path = source
+        self._mtime = mtime
+        self._views = {}
+
+    # Build the filtered rows and time index for one frequency range
+    def _build_view(self, low, high):
+        rows = self._rows
+        mask = (rows['frequency'] >= low) & (rows['frequency'] <= high)
+        if not mask.all():
+            rows = rows[mask]
+            rows.flags.writeable = False
+
+        times, starts = np.unique(rows['time'], return_index=True)
+        return {
+            'rows': rows,
+            'unique_times': times,
+            'time_offsets': np.append(starts, len(rows))
+        }
+
+    def _get_view(self, frequency_range):
+        self._refresh()
+        key = (float(frequency_range[0]), float(frequency_range[1]))
+        view = self._views.get(key)
+        if view is None:
+            if len(self._views) >= self.max_cached_ranges:
+                self._views.pop(next(iter(self._views)))
+            view = self._build_view(*key)
+            self._views[key] = view
+        return view
+
+    # All rows, sorted by time
+    def rows(self):
+        with self._lock:
+            self._refresh()
+            return self._rows
+
+    def __len__(self):
+        return len(self.rows())
+
+    # Rows for `n_times` consecutive timestamps inside the frequency range,
+    # starting at a random timestamp (or at `start` if one is given). The
+    # result is a read-only view into the resident array, not a copy.
+    def window(self, frequency_range, n_times=100, start=None, rng=np.random):
+        with self._lock:
+            view = self._get_view(frequency_range)
+
+        unique_times = view['unique_times']
+        if len(unique_times) == 0:
+            return None
+
+        if start is None:
+            start = rng.randint(0, max(1, len(unique_times) - n_times))
+        stop = min(start + n_times, len(unique_times))
+
+        offsets = view['time_offsets']
+        return view['rows'][offsets[start]:offsets[stop]]
+
+    # Same as window() but starting at the first timestamp >= `timestamp`
+    def window_at(self, frequency_range, timestamp, n_times=100):
+        with self._lock:
+            view = self._get_view(frequency_range)
+        start = int(np.searchsorted(view['unique_times'], timestamp, side='left'))
+        if start >= len(view['unique_times']):
+            return None
+        return self.window(frequency_range, n_times, start=start)
+
+
+
+# Indices of a stratified random subsample of about `size` rows. Strata are the
+# dataset label crossed with `n_freq_bins` frequency quantile bins; every
+# stratum contributes in proportion to its size and at least one row, so rare
+# anomaly classes survive the subsampling.
+def stratified_sample(rows, size, n_freq_bins=16, seed=42):
+    if size <= 0 or size >= len(rows):
+        return np.arange(len(rows))
+
+    rng = np.random.RandomState(seed)
+    freqs = rows['frequency']
+    edges = np.unique(np.quantile(freqs, np.linspace(0, 1, n_freq_bins + 1)[1:-1]))
+    strata = np.searchsorted(edges, freqs, side='right') * 2 + (rows['is_anomaly'] == 1)
+
+    # Shuffle, then group by stratum so each group's head is a random sample
+    order = rng.permutation(len(rows))
+    order = order[np.argsort(strata[order], kind='stable')]
+    _, starts, counts = np.unique(strata[order], return_index=True, return_counts=True)
+    quotas = np.minimum(counts, np.maximum(1, np.round(counts * size / len(rows)).astype(int)))
+
+    picked = np.concatenate([order[start:start + quota] for start, quota in zip(starts, quotas)])
+    return np.sort(picked)
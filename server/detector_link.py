@@ -0,0 +1,153 @@
+import os
+import queue
+import secrets
+import threading
+import time
+from multiprocessing.connection import Listener, Client, AuthenticationError
+
+SOCKET_FILE = "detector.sock"
+AUTHKEY_FILE = "detector.key"
+
+# Seconds a relayed event stream may stay idle before the detection process
+# checks whether the worker is still subscribed
+RELAY_POLL_INTERVAL = 1.0
+
+# Response headers passed back from forwarded requests
+FORWARDED_HEADERS = ('Content-Type', 'ETag', 'Vary', 'Cache-Control')
+
+
+def socket_path(directory):
+    return os.path.join(directory, SOCKET_FILE)
+
+
+# Shared secret authenticating workers to the detection process. The
+# detection process creates it, readable only by its own user.
+def load_authkey(directory, create=False):
+    path = os.path.join(directory, AUTHKEY_FILE)
+    if create:
+        fd = os.open(f"{path}.{os.getpid()}.tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(secrets.token_bytes(32))
+        os.replace(f"{path}.{os.getpid()}.tmp", path)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+# Detection process side of the link to the HTTP workers, on a Unix socket.
+# A connection either forwards requests, which run through the Flask app of
+# this process (control and detector status endpoints), or subscribes to the
+# push stream and then receives every encoded event of `broadcaster`.
+class DetectorService:
+    def __init__(self, directory, flask_app, broadcaster):
+        self.directory = directory
+        self.flask_app = flask_app
+        self.broadcaster = broadcaster
+
+    def serve_forever(self):
+        path = socket_path(self.directory)
+        if os.path.exists(path):
+            os.unlink(path)  # Left behind by a detection process that didn't exit cleanly
+        with Listener(path, family='AF_UNIX', authkey=load_authkey(self.directory, create=True)) as listener:
+            print(f"Detection process listening on {path}")
+            while True:
+                try:
+                    connection = listener.accept()
+                except (AuthenticationError, OSError, EOFError) as e:
+                    print(f"Rejected worker connection: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+
+    def _handle(self, connection):
+        client = self.flask_app.test_client()
+        try:
+            while True:
+                message = connection.recv()
+                if message[0] == "subscribe":
+                    self._stream(connection)
+                    return
+                _, method, path, query_string, headers, body = message
+                response = client.open(path, method=method, query_string=query_string, headers=headers, data=body)
+                connection.send((
+                    response.status_code,
+                    [(name, value) for name, value in response.headers if name in FORWARDED_HEADERS],
+                    response.get_data()
+                ))
+        except (EOFError, OSError):
+            pass
+        finally:
+            connection.close()
+
+    def _stream(self, connection):
+        subscription = self.broadcaster.subscribe()
+        try:
+            while True:
+                try:
+                    message = subscription.queue.get(timeout=RELAY_POLL_INTERVAL)
+                except queue.Empty:
+                    message = b""  # Empty keepalive, fails once the worker has gone
+                connection.send_bytes(message)
+        finally:
+            self.broadcaster.unsubscribe(subscription)
+
+
+# HTTP worker side of the link: forwards requests over one connection per
+# thread, and relays the detection process's events into a local broadcaster
+# while that has subscribers. Raises ConnectionError if the detection process
+# can't be reached.
+class DetectorClient:
+    def __init__(self, directory):
+        self.directory = directory
+        self._local = threading.local()
+        self._relay = None
+        self._relay_lock = threading.Lock()
+
+    def _connect(self):
+        try:
+            return Client(socket_path(self.directory), family='AF_UNIX', authkey=load_authkey(self.directory))
+        except (OSError, EOFError, AuthenticationError) as e:
+            raise ConnectionError(f"detection process not reachable at {socket_path(self.directory)}: {e}")
+
+    # (status, headers, body) of the request as answered by the detection process
+    def request(self, method, path, query_string, headers, body):
+        message = ("request", method, path, query_string, headers, body)
+        for attempt in range(2):
+            connection = getattr(self._local, 'connection', None)
+            if connection is None:
+                connection = self._local.connection = self._connect()
+            try:
+                connection.send(message)
+                return connection.recv()
+            except (OSError, EOFError):
+                # The detection process restarted since; reconnect once
+                connection.close()
+                self._local.connection = None
+        raise ConnectionError("detection process closed the connection")
+
+    # Start relaying events into `broadcaster` (once per process)
+    def relay_events(self, broadcaster):
+        with self._relay_lock:
+            if self._relay is None or not self._relay.is_alive():
+                self._relay = threading.Thread(target=self._run_relay, args=(broadcaster,), daemon=True)
+                self._relay.start()
+
+    def _run_relay(self, broadcaster):
+        while True:
+            if not broadcaster.has_subscribers:
+                time.sleep(0.1)
+                continue
+            try:
+                connection = self._connect()
+                try:
+                    connection.send(("subscribe",))
+                    # Unsubscribed as soon as the last local client has gone,
+                    # so the detection process only encodes events someone reads
+                    while broadcaster.has_subscribers:
+                        if connection.poll(RELAY_POLL_INTERVAL):
+                            message = connection.recv_bytes()
+                            if message:
+                                broadcaster.publish_message(message)
+                finally:
+                    connection.close()
+            except (ConnectionError, OSError, EOFError) as e:
+                print(f"Event relay from the detection process interrupted: {e}")
+                time.sleep(1.0)
@@ -0,0 +1,108 @@
+import threading
+import types
+
+from signal_buffer import SignalRingBuffer, AnomalyBuffer
+
+
+# Read-only deep copy of a JSON config: dicts become mapping proxies and lists
+# tuples, so a published config can be shared between threads as is
+def freeze_config(value):
+    if isinstance(value, dict):
+        return types.MappingProxyType({key: freeze_config(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_config(item) for item in value)
+    return value
+
+
+# Shared state of the detector: the signal and anomaly buffers, the rolling
+# spectrogram, the active config and whether processing runs.
+#
+# Request threads only ever read published state. The config is an immutable
+# object replaced by one reference assignment; the buffers are seqlocks whose
+# readers never wait on the processing thread; the spectrogram publishes
+# immutable snapshots. The only lock here, `_control_lock`, serializes
+# start/stop/config changes against each other and is taken by the processing
+# thread once per tick at most, when a config change is pending.
+#
+# A config sent while processing runs is parked in `_pending_config` and
+# becomes active at the next tick boundary (begin_tick), so a tick never sees
+# half of one config and half of another.
+class DetectionEngine:
+    def __init__(self, config, signal_capacity, anomaly_capacity):
+        self.signals = SignalRingBuffer(signal_capacity)
+        self.anomalies = AnomalyBuffer(anomaly_capacity)
+        self.spectrogram = None  # RollingSpectrogram, replaced by the processing thread
+        self.pipeline = None  # AcquisitionPipeline of the current run
+        self.tick = 0
+
+        self._config = freeze_config(config)
+        self._pending_config = None
+        self._running = False
+        self._generation = 0  # Incremented per run, so a stale thread can tell it should exit
+        self._thread = None
+        self._control_lock = threading.Lock()
+
+    @property
+    def config(self):
+        return self._config
+
+    @property
+    def running(self):
+        return self._running
+
+    # Thread of the current (or last) run
+    @property
+    def thread(self):
+        return self._thread
+
+    # Start `target(generation)` on a processing thread unless one is running.
+    # A `config` replaces the active one right away when stopped, or at the next
+    # tick boundary when running. Returns True if processing was started.
+    def start(self, target, config=None):
+        with self._control_lock:
+            if config is not None:
+                if self._running:
+                    self._pending_config = freeze_config(config)
+                else:
+                    self._config = freeze_config(config)
+                    self._pending_config = None
+            if self._running:
+                return False
+
+            # A previous run may still be winding down; its generation is stale
+            # now, so it exits at its next check instead of resuming
+            self._running = True
+            self._generation += 1
+            self._thread = threading.Thread(target=target, args=(self._generation,), daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        with self._control_lock:
+            was_running = self._running
+            self._running = False
+            return was_running
+
+    # Whether the run started as `generation` should keep going
+    def should_run(self, generation):
+        return self._running and self._generation == generation
+
+    # Whether no later run has been started since `generation`, i.e. whether
+    # resources shared between runs are still that run's to release
+    def is_latest(self, generation):
+        return self._generation == generation
+
+    # Called by the processing thread before each tick. Activates a pending
+    # config and returns (config, previous), `previous` being the config it
+    # replaced or None if nothing changed.
+    def begin_tick(self):
+        self.tick += 1
+        if self._pending_config is None:
+            return self._config, None
+
+        with self._control_lock:
+            pending, self._pending_config = self._pending_config, None
+            if pending is None or pending == self._config:
+                return self._config, None
+            previous, self._config = self._config, pending
+            return pending, previous
@@ -0,0 +1,118 @@
+import itertools
+import json
+import queue
+import threading
+
+# Events a subscriber may fall behind by before new ones are dropped for it
+DEFAULT_QUEUE_SIZE = 64
+
+# Seconds of silence after which a comment line is sent to keep proxies from
+# closing the connection
+KEEPALIVE_INTERVAL = 15.0
+
+
+# Format one Server-Sent Events message
+def sse_message(event, data, event_id=None):
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.extend(f"data: {line}" for line in data.split("\n"))
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+# One connected client: a bounded queue of already encoded messages
+class Subscription:
+    def __init__(self, queue_size):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.delivered = 0
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, message):
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+
+# Fan-out of processing results to Server-Sent Events clients.
+#
+# publish() serializes an event once and offers the same bytes to every
+# subscriber, so the cost of a tick hardly depends on how many dashboards are
+# connected; with none connected it costs nothing at all. Each subscriber has
+# its own bounded queue. A client that stops reading loses new events once its
+# queue is full instead of holding back the processing thread or the other
+# clients.
+class EventBroadcaster:
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE, keepalive_interval=KEEPALIVE_INTERVAL):
+        self.queue_size = queue_size
+        self.keepalive_interval = keepalive_interval
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+        self.events_published = 0
+        self.events_dropped = 0
+
+    @property
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def subscribe(self):
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._subscribers = self._subscribers + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.closed = True
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscription]
+
+    # Serialize `data` once (a dict, or an already serialized JSON string) and
+    # queue it for every subscriber
+    def publish(self, event, data):
+        if not self._subscribers:
+            return 0
+        payload = data if isinstance(data, str) else json.dumps(data)
+        return self.publish_message(sse_message(event, payload, next(self._ids)))
+
+    # Queue an already encoded message (e.g. relayed from the detection
+    # process) for every subscriber
+    def publish_message(self, message):
+        subscribers = self._subscribers
+        delivered = 0
+        for subscription in subscribers:
+            if subscription.offer(message):
+                delivered += 1
+            else:
+                self.events_dropped += 1
+        self.events_published += 1
+        return delivered
+
+    # Response body for one client; `initial` messages are sent first
+    def stream(self, subscription, initial=()):
+        try:
+            for message in initial:
+                yield message
+            while not subscription.closed:
+                try:
+                    message = subscription.queue.get(timeout=self.keepalive_interval)
+                except queue.Empty:
+                    yield b": keepalive\n\n"
+                    continue
+                subscription.delivered += 1
+                yield message
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self):
+        subscribers = self._subscribers
+        return {
+            "subscribers": len(subscribers),
+            "eventsPublished": self.events_published,
+            "eventsDropped": self.events_dropped,
+            "maxQueueDepth": max((s.queue.qsize() for s in subscribers), default=0)
+        }
@@ -0,0 +1,206 @@
+import bisect
+import collections
+import sys
+import threading
+import time
+
+# Latency buckets in seconds, from 100 µs to 10 s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value):
+    if value is None:
+        return "NaN"
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value))
+
+
+# Monotonically increasing count
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=None):
+        self.name = name
+        self.help = help_text
+        self.labels = labels or {}
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self):
+        yield self.name, self.labels, self.value
+
+
+# Latency histogram with fixed buckets. observe() is a bisect and two
+# additions, cheap enough to call several times per frame on the hot path.
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=None, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels or {}
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    # Time a block: `with histogram.time(): ...`
+    def time(self):
+        return _Timer(self)
+
+    def samples(self):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), list(self.counts)):
+            cumulative += count
+            yield f"{self.name}_bucket", dict(self.labels, le=_format_value(bound)), cumulative
+        yield f"{self.name}_sum", self.labels, self.sum
+        yield f"{self.name}_count", self.labels, cumulative
+
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+# Events per second over a sliding window of whole seconds. mark() only
+# touches the current second's slot.
+class RateMeter:
+    def __init__(self, window=10):
+        self.window = window
+        self._slots = [0] * (window + 1)
+        self._seconds = [0] * (window + 1)
+
+    def mark(self, n=1):
+        second = int(time.monotonic())
+        slot = second % len(self._slots)
+        if self._seconds[slot] != second:
+            self._seconds[slot] = second
+            self._slots[slot] = 0
+        self._slots[slot] += n
+
+    # Average over the last `window` complete seconds
+    def rate(self):
+        now = int(time.monotonic())
+        return sum(count for count, second in zip(self._slots, self._seconds)
+                   if now - self.window <= second < now) / self.window
+
+
+# Value read from `read()` at scrape time, so the hot path pays nothing for it
+class CallbackMetric:
+    def __init__(self, name, help_text, read, kind='gauge', labels=None):
+        self.name = name
+        self.help = help_text
+        self.read = read
+        self.kind = kind
+        self.labels = labels or {}
+
+    def samples(self):
+        yield self.name, self.labels, self.read()
+
+
+# Set of metrics rendered in the Prometheus text exposition format. Metrics
+# sharing a name (e.g. one histogram per stage label) form one family.
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics = self._metrics + [metric]
+        return metric
+
+    def counter(self, name, help_text, labels=None):
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=None, buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def gauge_fn(self, name, help_text, read, labels=None):
+        return self.register(CallbackMetric(name, help_text, read, 'gauge', labels))
+
+    def counter_fn(self, name, help_text, read, labels=None):
+        return self.register(CallbackMetric(name, help_text, read, 'counter', labels))
+
+    def render(self):
+        families = collections.OrderedDict()
+        for metric in self._metrics:
+            families.setdefault(metric.name, []).append(metric)
+
+        lines = []
+        for name, metrics in families.items():
+            lines.append(f"# HELP {name} {metrics[0].help}")
+            lines.append(f"# TYPE {name} {metrics[0].kind}")
+            for metric in metrics:
+                try:
+                    samples = list(metric.samples())
+                except Exception as e:
+                    print(f"Error collecting metric {name}: {e}")
+                    continue
+                for sample_name, labels, value in samples:
+                    lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Statistical profiler: every `interval` seconds it records the stacks of
+# `threads` (all other threads by default), for `duration` seconds. Costs
+# nothing unless run. Returns the hottest functions by own ("self") and
+# inclusive ("total") samples.
+def sample_profile(duration, interval=0.005, top=25, threads=None):
+    own = collections.Counter()
+    total = collections.Counter()
+    n_samples = 0
+    me = threading.get_ident()
+    wanted = None if threads is None else {thread.ident for thread in threads if thread is not None}
+
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == me or (wanted is not None and thread_id not in wanted):
+                continue
+            seen = set()
+            leaf = True
+            while frame is not None:
+                code = frame.f_code
+                key = f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+                if leaf:
+                    own[key] += 1
+                    leaf = False
+                if key not in seen:
+                    total[key] += 1
+                    seen.add(key)
+                frame = frame.f_back
+        n_samples += 1
+        time.sleep(interval)
+
+    def ranked(counter):
+        return [{"function": key, "samples": count} for key, count in counter.most_common(top)]
+
+    return {
+        "duration": duration,
+        "interval": interval,
+        "samples": n_samples,
+        "self": ranked(own),
+        "total": ranked(total)
+    }
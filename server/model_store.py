@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+import threading
+
+_fingerprint_cache = {}
+_fingerprint_lock = threading.Lock()
+
+
+# SHA-256 of a file's contents. Remembered per (size, mtime) so repeated starts
+# against an unchanged dataset do not re-read it.
+def file_fingerprint(path, chunk_size=1 << 20):
+    stat = os.stat(path)
+    cache_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _fingerprint_lock:
+        if cache_key in _fingerprint_cache:
+            return _fingerprint_cache[cache_key]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    fingerprint = digest.hexdigest()
+
+    with _fingerprint_lock:
+        _fingerprint_cache[cache_key] = fingerprint
+    return fingerprint
+
+
+# On-disk cache of fitted models.
+#
+# Artifacts are stored with joblib under a key derived from the model name, its
+# hyperparameters and a fingerprint of the training data, so any change to
+# either produces a new artifact instead of silently reusing a stale one.
+class ModelStore:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def key(self, name, params, fingerprint):
+        payload = json.dumps({"name": name, "params": params, "data": fingerprint}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def path(self, name, key):
+        return os.path.join(self.directory, f"{name}-{key}.joblib")
+
+    def load(self, name, key):
+        path = self.path(name, key)
+        if not os.path.exists(path):
+            return None
+        import joblib  # Deferred until a model is actually loaded or saved
+        try:
+            return joblib.load(path)
+        except Exception as e:
+            print(f"Ignoring unreadable model artifact {path}: {e}")
+            return None
+
+    # Write to a temporary file first so a crash never leaves half an artifact
+    def save(self, name, key, model):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(name, key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        import joblib
+        joblib.dump(model, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    # Returns (model, loaded) where loaded tells whether it came from disk
+    def load_or_fit(self, name, params, fingerprint, fit):
+        key = self.key(name, params, fingerprint)
+        model = self.load(name, key)
+        if model is not None:
+            return model, True
+
+        model = fit()
+        try:
+            self.save(name, key, model)
+        except OSError as e:
+            print(f"Could not save model artifact: {e}")
+        return model, False
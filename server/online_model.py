@@ -0,0 +1,120 @@
+import threading
+import time
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+DEFAULT_REFIT_INTERVAL = 60.0  # Seconds between refits
+DEFAULT_RESERVOIR_SIZE = 20000  # Maximum samples a refit is trained on
+DEFAULT_MIN_REFIT_SAMPLES = 1000
+
+
+# IsolationForest that keeps adapting to the RF environment.
+#
+# Samples scored as normal are fed into a fixed-size reservoir (Algorithm R).
+# Every `refit_interval` seconds a background thread fits a replacement model
+# on a copy of the reservoir and swaps it in with a single reference
+# assignment, so scoring never waits for a fit. After each refit the reservoir
+# keeps its contents but restarts its sample count, which makes new samples
+# displace old ones quickly: the reservoir is biased towards recent traffic.
+#
+# decision_function() reads the current model once per call, so a swap in the
+# middle of scoring a batch can never mix two models' scores and offsets.
+class OnlineDetector:
+    mode = "online"
+
+    def __init__(self, model, model_params, refit_interval=DEFAULT_REFIT_INTERVAL,
+                 reservoir_size=DEFAULT_RESERVOIR_SIZE, min_refit_samples=DEFAULT_MIN_REFIT_SAMPLES,
+                 n_features=2, seed=42):
+        self.model = model
+        self.model_params = model_params
+        self.refit_interval = refit_interval
+        self.min_refit_samples = min(min_refit_samples, reservoir_size)
+
+        self._reservoir = np.empty((reservoir_size, n_features))
+        self._count = 0  # Filled slots
+        self._seen = 0  # Samples offered since the last refit
+        self._rng = np.random.RandomState(seed)
+        self._lock = threading.Lock()
+        self._refit_thread = None
+        self._last_refit = time.monotonic()
+
+        self.swap_count = 0
+        self.refit_failures = 0
+        self.last_refit_seconds = None
+        self.total_refit_seconds = 0.0
+
+    @property
+    def offset_(self):
+        return self.model.offset_
+
+    def score_samples(self, features):
+        return self.model.score_samples(features)
+
+    def decision_function(self, features):
+        model = self.model
+        return model.score_samples(features) - model.offset_
+
+    def predict(self, features):
+        return np.where(self.decision_function(features) < 0, -1, 1)
+
+    # Offer a batch of normal samples to the reservoir
+    def observe(self, features):
+        n = len(features)
+        if n == 0:
+            return
+        capacity = len(self._reservoir)
+
+        with self._lock:
+            positions = self._seen + np.arange(n)
+            slots = np.where(positions < capacity, positions, self._rng.randint(0, positions + 1))
+            keep = slots < capacity
+            self._reservoir[slots[keep]] = features[keep]
+            self._seen += n
+            self._count = min(capacity, self._count + n)
+
+    # Start a background refit if one is due; returns True if one was started
+    def maybe_refit(self):
+        if time.monotonic() - self._last_refit < self.refit_interval:
+            return False
+        if self._refit_thread is not None and self._refit_thread.is_alive():
+            return False
+        if self._count < self.min_refit_samples:
+            return False
+        return self.refit_async()
+
+    def refit_async(self):
+        with self._lock:
+            training = self._reservoir[:self._count].copy()
+            self._seen = self._count
+        self._last_refit = time.monotonic()
+        self._refit_thread = threading.Thread(target=self._refit, args=(training,), daemon=True)
+        self._refit_thread.start()
+        return True
+
+    def _refit(self, training):
+        started = time.perf_counter()
+        try:
+            replacement = IsolationForest(**self.model_params).fit(training)
+        except Exception as e:
+            self.refit_failures += 1
+            print(f"Model refit failed: {e}")
+            return
+
+        # Publishing the new model is one reference assignment
+        self.model = replacement
+        self.last_refit_seconds = time.perf_counter() - started
+        self.total_refit_seconds += self.last_refit_seconds
+        self.swap_count += 1
+
+    def stats(self):
+        return {
+            "reservoirSize": self._count,
+            "reservoirCapacity": len(self._reservoir),
+            "refitInterval": self.refit_interval,
+            "refitInProgress": self._refit_thread is not None and self._refit_thread.is_alive(),
+            "swapCount": self.swap_count,
+            "refitFailures": self.refit_failures,
+            "lastRefitSeconds": self.last_refit_seconds,
+            "meanRefitSeconds": self.total_refit_seconds / self.swap_count if self.swap_count else None
+        }
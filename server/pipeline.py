@@ -0,0 +1,166 @@
+import queue
+import threading
+import time
+
+from signal_buffer import empty_signals
+
+# Number of frame buffers cycling between the two stages (2 = double buffering)
+DEFAULT_NUM_BUFFERS = 2
+
+# Initial rows per frame buffer; a buffer only grows if a frame does not fit
+DEFAULT_FRAME_CAPACITY = 4096
+
+
+# Pre-allocated frame buffer handed back and forth between the stages
+class FrameBuffer:
+    def __init__(self, capacity):
+        self.rows = empty_signals(capacity)
+        self.size = 0
+        self.acquired_at = 0.0
+
+    def fill(self, data):
+        if len(data) > len(self.rows):
+            self.rows = empty_signals(1 << (len(data) - 1).bit_length())
+        self.rows[:len(data)] = data
+        self.size = len(data)
+        self.acquired_at = time.time()
+
+    def view(self):
+        return self.rows[:self.size]
+
+
+# Two-stage acquisition/processing pipeline.
+#
+# An acquisition thread calls `acquire()` and copies each frame into a free
+# pre-allocated buffer, then queues it; the calling thread takes ready frames
+# and runs `process(frame)` on them, which returns how many of the frame's
+# samples it actually ran through the detector. Only `num_buffers` buffers
+# exist, which bounds the queue:
+#
+# - For live sources (`is_live()` true) a frame that arrives while every buffer
+#   is still queued is dropped and counted, so a slow detector never stalls the
+#   device read.
+# - For files and replays the acquisition thread waits for a free buffer
+#   instead (backpressure), so frames run back to back at the rate of the
+#   slower stage and nothing is lost.
+#
+# `tick_interval()` gives the desired seconds between acquisitions. Pacing is
+# deadline based, so time spent acquiring counts towards the interval; 0 means
+# as fast as possible. `on_latency(seconds)`, if given, is called with the time
+# from acquisition to the end of processing of every frame.
+class AcquisitionPipeline:
+    def __init__(self, acquire, process, tick_interval=lambda: 0.0, is_live=lambda: False,
+                 num_buffers=DEFAULT_NUM_BUFFERS, frame_capacity=DEFAULT_FRAME_CAPACITY, on_latency=None):
+        self.acquire = acquire
+        self.process = process
+        self.tick_interval = tick_interval
+        self.is_live = is_live
+        self.on_latency = on_latency
+
+        self._free = queue.Queue()
+        for _ in range(num_buffers):
+            self._free.put(FrameBuffer(frame_capacity))
+        self._ready = queue.Queue(maxsize=num_buffers)
+        self._stop = threading.Event()
+        self._producer = None
+
+        self.frames_acquired = 0
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self.empty_reads = 0
+        self.samples_processed = 0
+
+    # Frames waiting for the processing stage
+    @property
+    def queue_depth(self):
+        return self._ready.qsize()
+
+    @property
+    def producer(self):
+        return self._producer
+
+    def stats(self):
+        return {
+            "framesAcquired": self.frames_acquired,
+            "framesProcessed": self.frames_processed,
+            "framesDropped": self.frames_dropped,
+            "emptyReads": self.empty_reads,
+            "samplesProcessed": self.samples_processed,
+            "queueDepth": self.queue_depth
+        }
+
+    def _next_free_buffer(self):
+        if self.is_live():
+            try:
+                return self._free.get_nowait()
+            except queue.Empty:
+                return None
+        while not self._stop.is_set():
+            try:
+                return self._free.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
+
+    def _acquisition_loop(self):
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            interval = self.tick_interval()
+            if interval > 0:
+                now = time.monotonic()
+                if next_tick > now:
+                    self._stop.wait(next_tick - now)
+                    if self._stop.is_set():
+                        break
+                # Skip missed ticks instead of bursting to catch up
+                next_tick = max(next_tick, time.monotonic() - interval) + interval
+
+            try:
+                data = self.acquire()
+            except Exception as e:
+                print(f"Error acquiring RF data: {e}")
+                self._stop.wait(0.5)
+                continue
+
+            if data is None or len(data) == 0:
+                self.empty_reads += 1
+                if interval <= 0:
+                    self._stop.wait(0.01)  # Nothing to read, don't spin
+                continue
+
+            self.frames_acquired += 1
+            buffer = self._next_free_buffer()
+            if buffer is None:
+                if not self._stop.is_set():
+                    self.frames_dropped += 1
+                continue
+
+            buffer.fill(data)
+            self._ready.put(buffer)
+
+    # Run until `should_run()` turns false; processing happens on this thread
+    def run(self, should_run):
+        self._stop.clear()
+        self._producer = threading.Thread(target=self._acquisition_loop, daemon=True)
+        self._producer.start()
+        try:
+            while should_run():
+                try:
+                    buffer = self._ready.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                try:
+                    scored = self.process(buffer.view())
+                    self.frames_processed += 1
+                    self.samples_processed += scored
+                    if self.on_latency is not None:
+                        self.on_latency(time.time() - buffer.acquired_at)
+                finally:
+                    self._free.put(buffer)
+        finally:
+            self.stop()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._producer is not None and self._producer is not threading.current_thread():
+            self._producer.join(timeout)
@@ -0,0 +1,203 @@
+import os
+import time
+
+import numpy as np
+from scipy import fft as scipy_fft
+from scipy import signal as scipy_signal
+
+from signal_buffer import make_signals
+
+# IQ samples fetched per read; ~0.1 s of data at 2.4 MS/s
+DEFAULT_BLOCK_SIZE = 256 * 1024
+
+# Welch parameters: fraction of overlap between FFT segments and number of
+# segments averaged into one PSD frame
+DEFAULT_OVERLAP = 0.5
+DEFAULT_SEGMENTS_PER_FRAME = 8
+
+
+# Persistent RTL-SDR handle. The device stays open between reads and is only
+# retuned when the requested settings actually change.
+class RtlSdrSource:
+    name = "RTL-SDR"
+
+    def __init__(self, sdr):
+        self.sdr = sdr
+
+    @property
+    def sample_rate(self):
+        return self.sdr.sample_rate
+
+    @property
+    def center_freq(self):
+        return self.sdr.center_freq
+
+    def configure(self, center_freq, sample_rate):
+        if self.sdr.sample_rate != sample_rate:
+            self.sdr.sample_rate = sample_rate
+        if self.sdr.center_freq != center_freq:
+            self.sdr.center_freq = center_freq
+
+    def read(self, n):
+        return self.sdr.read_samples(n)
+
+    def close(self):
+        self.sdr.close()
+
+
+# Stand-in for the device that replays a recorded IQ capture, looping at the
+# end. Supports .npy complex arrays, GNU Radio style complex64 files (.cfile,
+# .fc32, .raw) and rtl_sdr's interleaved unsigned 8-bit output (.cu8, .bin).
+# The file is memory mapped, so captures of any size can be replayed. With
+# `realtime` set, reads are paced to the sample rate like the real device;
+# otherwise they return as fast as the disk allows.
+class IQFileSource:
+    name = "IQ replay"
+
+    def __init__(self, path, sample_rate=2.4e6, center_freq=100e6, realtime=True):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.center_freq = center_freq
+        self.realtime = realtime
+        self.position = 0
+        self._deadline = None
+
+        ext = os.path.splitext(path)[1].lower()
+        if ext == '.npy':
+            self._data = np.load(path, mmap_mode='r')
+            self._interleaved_u8 = False
+        elif ext in ('.cu8', '.bin'):
+            self._data = np.memmap(path, dtype=np.uint8, mode='r')
+            self._interleaved_u8 = True
+        else:
+            self._data = np.memmap(path, dtype=np.complex64, mode='r')
+            self._interleaved_u8 = False
+
+    def __len__(self):
+        return len(self._data) // 2 if self._interleaved_u8 else len(self._data)
+
+    # A recording has fixed settings; just remember what the caller asked for
+    def configure(self, center_freq, sample_rate):
+        self.center_freq = center_freq
+        self.sample_rate = sample_rate
+
+    def _slice(self, start, stop):
+        if not self._interleaved_u8:
+            return np.asarray(self._data[start:stop], dtype=np.complex64)
+        raw = np.asarray(self._data[2 * start:2 * stop], dtype=np.float32)
+        raw = (raw - 127.5) / 127.5
+        return (raw[0::2] + 1j * raw[1::2]).astype(np.complex64)
+
+    def read(self, n):
+        total = len(self)
+        if total == 0 or n <= 0:
+            return np.empty(0, dtype=np.complex64)
+
+        chunks = []
+        while n > 0:
+            stop = min(self.position + n, total)
+            chunks.append(self._slice(self.position, stop))
+            n -= stop - self.position
+            self.position = stop % total
+        samples = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+        if self.realtime:
+            now = time.monotonic()
+            self._deadline = max(self._deadline or now, now - 1.0) + len(samples) / self.sample_rate
+            if self._deadline > now:
+                time.sleep(self._deadline - now)
+        return samples
+
+    def close(self):
+        self._data = None
+
+
+# Welch power spectral density over a stream of IQ blocks.
+#
+# The window, scaling and frequency axis are computed once per configuration
+# and the FFT size never changes, so scipy.fft keeps reusing its cached plan.
+# Samples left over at the end of a block are carried into the next one so
+# segments overlap seamlessly across reads.
+class WelchSpectrum:
+    def __init__(self, nperseg, sample_rate, center_freq, overlap=DEFAULT_OVERLAP,
+                 segments_per_frame=DEFAULT_SEGMENTS_PER_FRAME, window='hann'):
+        self.nperseg = nperseg
+        self.sample_rate = sample_rate
+        self.step = max(1, nperseg - int(nperseg * overlap))
+        self.segments_per_frame = segments_per_frame
+        self.window = scipy_signal.get_window(window, nperseg).astype(np.float32)
+        # Same density scaling as scipy.signal.welch (power per Hz)
+        self.scale = 1.0 / (sample_rate * np.sum(self.window.astype(np.float64) ** 2))
+        self.frequencies = (center_freq + scipy_fft.fftshift(scipy_fft.fftfreq(nperseg, 1.0 / sample_rate))) / 1e6
+        self._tail = np.empty(0, dtype=np.complex64)
+
+    # Seconds of signal covered by one PSD frame
+    @property
+    def frame_duration(self):
+        return self.segments_per_frame * self.step / self.sample_rate
+
+    # PSD frames for a block of IQ samples, shaped (n_frames, nperseg) with
+    # bins in ascending frequency order
+    def frames(self, iq):
+        iq = np.concatenate((self._tail, np.asarray(iq, dtype=np.complex64)))
+        if len(iq) < self.nperseg:
+            self._tail = iq
+            return np.empty((0, self.nperseg))
+
+        segments = np.lib.stride_tricks.sliding_window_view(iq, self.nperseg)[::self.step]
+        n_frames = len(segments) // self.segments_per_frame
+        n_segments = n_frames * self.segments_per_frame
+        self._tail = iq[n_segments * self.step:].copy()
+        if n_frames == 0:
+            return np.empty((0, self.nperseg))
+
+        spectra = scipy_fft.fft(segments[:n_segments] * self.window, axis=-1)
+        power = (spectra.real ** 2 + spectra.imag ** 2) * self.scale
+        psd = power.reshape(n_frames, self.segments_per_frame, self.nperseg).mean(axis=1)
+        return scipy_fft.fftshift(psd, axes=-1)
+
+
+# Acquisition stage for SDR mode: reads large IQ blocks from a persistent
+# source and turns them into frequency-bin power samples for the detector.
+class SDRStream:
+    def __init__(self, source, block_size=DEFAULT_BLOCK_SIZE):
+        self.source = source
+        self.block_size = block_size
+        self.spectrum = None
+        self._settings = None
+
+    # Retune the source and rebuild the spectrum stage when the config changes
+    def configure(self, config):
+        center_freq = (config["frequencyRange"][0] + config["frequencyRange"][1]) / 2 * 1e6
+        sample_rate = config["samplingRate"] * 1e6
+        settings = (center_freq, sample_rate, int(config["windowSize"]))
+        if settings == self._settings:
+            return
+
+        self.source.configure(center_freq, sample_rate)
+        self.spectrum = WelchSpectrum(settings[2], sample_rate, center_freq)
+        self._settings = settings
+
+    # Read one block and return its PSD frames as samples inside frequencyRange
+    def read(self, config):
+        self.configure(config)
+        started = time.time()
+        psd = self.spectrum.frames(self.source.read(self.block_size))
+        if len(psd) == 0:
+            return make_signals([], [], [])
+
+        low, high = config["frequencyRange"]
+        freqs = self.spectrum.frequencies
+        in_range = (freqs >= low) & (freqs <= high)
+        freqs, psd = freqs[in_range], psd[:, in_range]
+
+        frame_times = started + np.arange(len(psd)) * self.spectrum.frame_duration
+        return make_signals(
+            np.repeat(frame_times, len(freqs)),
+            np.tile(freqs, len(psd)),
+            psd.ravel(),
+            0  # Will be determined by ML
+        )
+
+    def close(self):
+        self.source.close()
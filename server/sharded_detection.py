@@ -0,0 +1,127 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+# Frames smaller than this are scored in-process; shipping them to the pool
+# costs more than it saves. Dataset frames (a few hundred rows) always stay
+# in-process, so the pool only pays off on large SDR frames.
+MIN_PARALLEL_ROWS = 4096
+
+# Per-band models, set in each pool worker by _init_worker
+_worker_models = None
+
+
+def _init_worker(models):
+    global _worker_models
+    _worker_models = models
+
+
+# Decision-function scores (negative = outlier) for one band's rows
+def _score_band(band, features):
+    model = _worker_models[band]
+    return model.score_samples(features) - model.offset_
+
+
+# Split a frequency range into `n_bands` equal sub-bands; returns the edges
+def split_bands(frequency_range, n_bands):
+    return np.linspace(float(frequency_range[0]), float(frequency_range[1]), n_bands + 1)
+
+
+# IsolationForest ensemble sharded across frequency sub-bands.
+#
+# The configured range is cut into equal sub-bands and every band gets its own
+# model, fitted on the training rows that fall inside it (a band without
+# training data falls back to `fallback`). Large frames are grouped by band
+# and each group is scored by a process pool whose workers receive all band
+# models once at start-up, so only the features travel per call. `n_workers`
+# defaults to one per CPU core, and to no pool at all on a single core;
+# n_workers=0 always scores in-process.
+#
+# score_samples() returns decision-function values and offset_ is 0, so the
+# ensemble is a drop-in replacement for a single model in scoring.score_batch.
+class ShardedDetector:
+    mode = "sharded"
+    offset_ = 0.0
+
+    def __init__(self, frequency_range, n_bands, n_workers=None, min_parallel_rows=MIN_PARALLEL_ROWS,
+                 **model_params):
+        self.edges = split_bands(frequency_range, n_bands)
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+            n_workers = n_workers if n_workers > 1 else 0
+        self.n_workers = n_workers
+        self.min_parallel_rows = min_parallel_rows
+        self.model_params = model_params or {"contamination": 0.05, "random_state": 42}
+        self.models = []
+        self._pool = None
+
+    @property
+    def n_bands(self):
+        return len(self.edges) - 1
+
+    # Band index of every row, out-of-range frequencies going to the edge bands
+    def band_of(self, frequencies):
+        return np.searchsorted(self.edges[1:-1], frequencies, side='right')
+
+    # Fit one model per band
+    def fit_models(self, features, fallback=None):
+        bands = self.band_of(features[:, 0])
+        models = []
+        for band in range(self.n_bands):
+            band_features = features[bands == band]
+            if len(band_features) == 0:
+                if fallback is None:
+                    fallback = IsolationForest(**self.model_params).fit(features)
+                models.append(fallback)
+            else:
+                models.append(IsolationForest(**self.model_params).fit(band_features))
+        return models
+
+    def fit(self, features, fallback=None):
+        return self.use_models(self.fit_models(features, fallback))
+
+    # Use already fitted per-band models (e.g. loaded from disk)
+    def use_models(self, models):
+        if len(models) != self.n_bands:
+            raise ValueError(f"expected {self.n_bands} band models, got {len(models)}")
+        self.models = list(models)
+
+        self.close()
+        if self.n_workers > 0:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.n_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.models,)
+            )
+        return self
+
+    def score_samples(self, features):
+        bands = self.band_of(features[:, 0])
+        scores = np.empty(len(features))
+        groups = [(band, np.flatnonzero(bands == band)) for band in np.unique(bands).tolist()]
+
+        if self._pool is None or len(features) < self.min_parallel_rows:
+            for band, rows in groups:
+                model = self.models[band]
+                scores[rows] = model.score_samples(features[rows]) - model.offset_
+            return scores
+
+        futures = [(rows, self._pool.submit(_score_band, band, features[rows])) for band, rows in groups]
+        for rows, future in futures:
+            scores[rows] = future.result()
+        return scores
+
+    def decision_function(self, features):
+        return self.score_samples(features)
+
+    def predict(self, features):
+        return np.where(self.score_samples(features) < 0, -1, 1)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,350 @@
+import json
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from signal_buffer import SIGNAL_DTYPE, SignalRingBuffer, _consistent_read
+from wire_format import encode_spectrogram
+
+# Every state file starts with this many bytes of int64 header fields
+HEADER_BYTES = 64
+
+SIGNALS_FILE = "signals.bin"
+SPECTROGRAM_FILE = "spectrogram.bin"
+ANOMALIES_FILE = "anomalies.bin"
+
+# Blob sizes. Files are sparse, so only the part actually written uses memory;
+# the largest spectrogram (50 x 512 bins) needs well under 1 MB
+SPECTROGRAM_BLOB_BYTES = 16 << 20
+ANOMALY_BYTES = 4096  # Per anomaly in the anomaly blob
+
+# Seconds between checks for a new spectrogram or anomaly list to publish
+PUBLISH_INTERVAL = 0.02
+
+# Seconds between checks whether the detection process replaced the files
+REATTACH_INTERVAL = 1.0
+
+# Seconds a read retries while a write is in progress before giving up on a
+# detection process that died mid-write
+READ_TIMEOUT = 1.0
+
+# Lengths of the sections of a published spectrogram: etag, JSON payload,
+# time points, frequencies; followed by the version
+SPECTROGRAM_SECTIONS = struct.Struct('<IIIIQ')
+
+
+# Directory holding the state files and the detector socket, RAM-backed where
+# the system has /dev/shm
+def default_state_dir():
+    if os.path.isdir("/dev/shm"):
+        return os.path.join("/dev/shm", "rf-detector")
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "shared")
+
+
+# Create a zeroed state file of `size` bytes under a temporary name and map it.
+# `init(buffer)` fills in the header before the file is moved into place, so a
+# reader never sees it half set up. Moving replaces the old file atomically:
+# processes still mapping that one keep a valid (if stale) copy rather than
+# faulting on a truncated mapping.
+def _create_mapping(path, size, init):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    buffer = np.memmap(tmp_path, dtype=np.uint8, mode='w+', shape=(size,)).view(np.ndarray)
+    init(buffer)
+    os.replace(tmp_path, path)
+    return buffer
+
+
+def _open_mapping(path):
+    return np.memmap(path, dtype=np.uint8, mode='r').view(np.ndarray)
+
+
+def _header_field(index):
+    def get(self):
+        return int(self._header[index])
+
+    def set(self, value):
+        self._header[index] = value
+    return property(get, set)
+
+
+# SignalRingBuffer whose rows and counters live in a memory-mapped file, so
+# other processes can read it while the detection process appends. Readers use
+# the same seqlock as in-process ones, with the version in the file header;
+# they never write to the file (it is mapped read-only for them).
+#
+# Header: seqlock version, head, count, last sequence number, capacity.
+class SharedSignalRingBuffer(SignalRingBuffer):
+    _read_timeout = READ_TIMEOUT
+    _version = _header_field(0)
+    _head = _header_field(1)
+    _count = _header_field(2)
+    _last_seq = _header_field(3)
+
+    def __init__(self, buffer):
+        self._header = buffer[:HEADER_BYTES].view(np.int64)
+        self.capacity = int(self._header[4])
+        self._rows = buffer[HEADER_BYTES:HEADER_BYTES + 2 * self.capacity * SIGNAL_DTYPE.itemsize].view(SIGNAL_DTYPE)
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def create(cls, path, capacity):
+        def init(buffer):
+            buffer[:HEADER_BYTES].view(np.int64)[4] = capacity
+        return cls(_create_mapping(path, HEADER_BYTES + 2 * capacity * SIGNAL_DTYPE.itemsize, init))
+
+    @classmethod
+    def open(cls, path):
+        return cls(_open_mapping(path))
+
+
+# Byte payload of up to `capacity` bytes in a memory-mapped file, replaced as
+# a whole by one writer under the same seqlock scheme.
+#
+# Header: seqlock version, payload length, capacity.
+class SharedBlob:
+    _read_timeout = READ_TIMEOUT
+    _version = _header_field(0)
+
+    def __init__(self, buffer):
+        self._header = buffer[:HEADER_BYTES].view(np.int64)
+        self.capacity = int(self._header[2])
+        self._data = buffer[HEADER_BYTES:HEADER_BYTES + self.capacity]
+
+    @classmethod
+    def create(cls, path, capacity):
+        def init(buffer):
+            buffer[:HEADER_BYTES].view(np.int64)[2] = capacity
+        return cls(_create_mapping(path, HEADER_BYTES + capacity, init))
+
+    @classmethod
+    def open(cls, path):
+        return cls(_open_mapping(path))
+
+    # Changes with every write; 0 until the first one
+    @property
+    def version(self):
+        return self._version
+
+    # Returns False (keeping the previous payload) if `payload` doesn't fit
+    def write(self, payload):
+        if len(payload) > self.capacity:
+            return False
+        self._version += 1
+        self._data[:len(payload)] = np.frombuffer(payload, dtype=np.uint8)
+        self._header[1] = len(payload)
+        self._version += 1
+        return True
+
+    # (version, payload) of the latest complete write
+    def read(self):
+        return _consistent_read(self, lambda: (self._version, self._data[:int(self._header[1])].tobytes()))
+
+
+def encode_published_spectrogram(frequencies, published):
+    (etag, payload), (version, time_points, intensities) = published
+    etag, payload = etag.encode(), payload.encode()
+    return b''.join((
+        SPECTROGRAM_SECTIONS.pack(len(etag), len(payload), len(time_points), len(frequencies), version),
+        etag,
+        payload,
+        np.asarray(time_points, dtype=np.float64).tobytes(),
+        np.asarray(frequencies, dtype=np.float64).tobytes(),
+        np.asarray(intensities, dtype=np.float64).tobytes()
+    ))
+
+
+# Read side of a RollingSpectrogram published by StatePublisher, with the same
+# snapshot() and binary_snapshot() as the original. The blob is decoded once
+# per version and process; binary encodings are made on first request.
+class SharedSpectrogram:
+    def __init__(self, blob):
+        self.blob = blob
+        self._decoded = None  # (blob version, snapshot, frequencies, frame)
+        self._binary = {}  # encoding -> (blob version, bytes)
+
+    def _current(self):
+        decoded = self._decoded
+        if decoded is not None and decoded[0] == self.blob.version:
+            return decoded
+
+        blob_version, data = self.blob.read()
+        if not data:
+            return None
+        etag_length, payload_length, n_times, n_freqs, version = SPECTROGRAM_SECTIONS.unpack_from(data)
+        offset = SPECTROGRAM_SECTIONS.size
+        etag = data[offset:offset + etag_length].decode()
+        offset += etag_length
+        payload = data[offset:offset + payload_length].decode()
+        offset += payload_length
+        arrays = np.frombuffer(data, dtype=np.float64, offset=offset)
+        time_points = arrays[:n_times]
+        frequencies = arrays[n_times:n_times + n_freqs]
+        intensities = arrays[n_times + n_freqs:].reshape(n_times, n_freqs)
+        decoded = (blob_version, (etag, payload), frequencies, (version, time_points, intensities))
+        self._decoded = decoded
+        return decoded
+
+    def snapshot(self):
+        decoded = self._current()
+        return decoded[1] if decoded else None
+
+    def binary_snapshot(self, encoding):
+        blob_version, (etag, _), frequencies, (version, time_points, intensities) = self._current()
+        cached = self._binary.get(encoding)
+        if cached is None or cached[0] != blob_version:
+            cached = (blob_version, encode_spectrogram(frequencies, time_points, intensities, encoding, version))
+            self._binary[encoding] = cached
+        return f"{etag}-{encoding}", cached[1]
+
+
+# Read side of an AnomalyBuffer published by StatePublisher, with the same
+# snapshot(), since() and last_seq
+class SharedAnomalies:
+    def __init__(self, blob):
+        self.blob = blob
+        self._decoded = (0, 0, [])  # (blob version, last sequence number, anomalies newest first)
+
+    def _current(self):
+        decoded = self._decoded
+        if decoded[0] != self.blob.version:
+            blob_version, data = self.blob.read()
+            state = json.loads(data) if data else {"lastSeq": 0, "anomalies": []}
+            decoded = (blob_version, state["lastSeq"], state["anomalies"])
+            self._decoded = decoded
+        return decoded
+
+    def __len__(self):
+        return len(self._current()[2])
+
+    @property
+    def last_seq(self):
+        return self._current()[1]
+
+    def snapshot(self, n=None):
+        _, _, anomalies = self._current()
+        return list(anomalies if n is None else anomalies[:n])
+
+    # Same numbering rules as AnomalyBuffer.since()
+    def since(self, seq, limit=None):
+        _, last_seq, anomalies = self._current()
+        first = max(seq + 1, last_seq - len(anomalies) + 1)
+        last = last_seq if limit is None else min(last_seq, first + limit - 1)
+        return anomalies[max(0, last_seq - last):max(0, last_seq - first + 1)]
+
+
+# Runs in the detection process: copies the engine's spectrogram and anomaly
+# list into their blobs whenever they change. Signals need no copying, the
+# engine appends straight into a SharedSignalRingBuffer.
+class StatePublisher:
+    def __init__(self, engine, spectrogram_blob, anomaly_blob, interval=PUBLISH_INTERVAL):
+        self.engine = engine
+        self.spectrogram_blob = spectrogram_blob
+        self.anomaly_blob = anomaly_blob
+        self.interval = interval
+        self._spectrogram = None
+        self._anomalies = None
+        self._too_large = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.publish()
+            except Exception as e:
+                print(f"Error publishing shared state: {e}")
+            time.sleep(self.interval)
+
+    def publish(self):
+        spectrogram = self.engine.spectrogram
+        published = spectrogram.published() if spectrogram else None
+        if published is not None and published is not self._spectrogram:
+            self._spectrogram = published
+            if not self.spectrogram_blob.write(encode_published_spectrogram(spectrogram.frequencies, published)):
+                if not self._too_large:
+                    print("Spectrogram too large for shared memory, workers keep serving the previous one")
+                self._too_large = True
+
+        anomalies = self.engine.anomalies
+        key = (anomalies.last_seq, len(anomalies))
+        if key != self._anomalies:
+            self._anomalies = key
+            self.anomaly_blob.write(json.dumps({"lastSeq": key[0], "anomalies": anomalies.snapshot()}).encode())
+
+
+# Move `engine`'s signal buffer into shared memory under `directory` and start
+# publishing its spectrogram and anomalies there. Call before processing starts.
+def share_engine_state(engine, directory, anomaly_capacity):
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    engine.signals = SharedSignalRingBuffer.create(os.path.join(directory, SIGNALS_FILE), engine.signals.capacity)
+    publisher = StatePublisher(
+        engine,
+        SharedBlob.create(os.path.join(directory, SPECTROGRAM_FILE), SPECTROGRAM_BLOB_BYTES),
+        SharedBlob.create(os.path.join(directory, ANOMALIES_FILE), max(anomaly_capacity, 1) * ANOMALY_BYTES)
+    )
+    publisher.start()
+    return publisher
+
+
+# Remove the files shared by share_engine_state, so workers stop serving them
+def remove_engine_state(directory):
+    for name in (SIGNALS_FILE, SPECTROGRAM_FILE, ANOMALIES_FILE):
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+# Stands in for DetectionEngine in HTTP worker processes: the signals,
+# anomalies and spectrogram the detection process shares under `directory`,
+# read-only. The files are reopened when the detection process restarts and
+# replaces them. Raises ConnectionError while they don't exist.
+class SharedEngineView:
+    pipeline = None
+    thread = None
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._attached = None  # (inode of the signals file, signals, anomalies, spectrogram)
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def _state(self):
+        attached = self._attached
+        if attached is not None and time.monotonic() - self._checked < REATTACH_INTERVAL:
+            return attached
+
+        with self._lock:
+            path = os.path.join(self.directory, SIGNALS_FILE)
+            try:
+                inode = os.stat(path).st_ino
+                if self._attached is None or self._attached[0] != inode:
+                    self._attached = (
+                        inode,
+                        SharedSignalRingBuffer.open(path),
+                        SharedAnomalies(SharedBlob.open(os.path.join(self.directory, ANOMALIES_FILE))),
+                        SharedSpectrogram(SharedBlob.open(os.path.join(self.directory, SPECTROGRAM_FILE)))
+                    )
+            except FileNotFoundError:
+                self._attached = None
+                raise ConnectionError(f"detection process not running (no shared state in {self.directory})")
+            self._checked = time.monotonic()
+            return self._attached
+
+    @property
+    def signals(self):
+        return self._state()[1]
+
+    @property
+    def anomalies(self):
+        return self._state()[2]
+
+    @property
+    def spectrogram(self):
+        return self._state()[3]
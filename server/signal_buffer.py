@@ -0,0 +1,226 @@
+import threading
+import time
+
+import numpy as np
+
+# One RF sample, as produced by get_rf_data and kept in the signal buffer
+SIGNAL_DTYPE = np.dtype([
+    ('time', np.float64),
+    ('frequency', np.float64),
+    ('amplitude', np.float64),
+    ('is_anomaly', np.int8)
+])
+
+
+# Allocate an empty batch of samples
+def empty_signals(n=0):
+    return np.zeros(n, dtype=SIGNAL_DTYPE)
+
+
+# Build a batch of samples from column arrays
+def make_signals(time, frequency, amplitude, is_anomaly=0):
+    rows = np.empty(np.broadcast(time, frequency, amplitude).size, dtype=SIGNAL_DTYPE)
+    rows['time'] = time
+    rows['frequency'] = frequency
+    rows['amplitude'] = amplitude
+    rows['is_anomaly'] = is_anomaly
+    return rows
+
+
+# Convert samples into the list-of-dicts format used by the API. With
+# `first_seq` every record also gets its sequence number.
+def signal_records(rows, first_seq=None):
+    records = [{
+        'time': t,
+        'frequency': f,
+        'amplitude': a,
+        'is_anomaly': is_anomaly
+    } for t, f, a, is_anomaly in zip(
+        rows['time'].tolist(),
+        rows['frequency'].tolist(),
+        rows['amplitude'].tolist(),
+        rows['is_anomaly'].tolist()
+    )]
+    if first_seq is not None:
+        for seq, record in enumerate(records, first_seq):
+            record['seq'] = seq
+    return records
+
+
+# Seqlock read: run `read()` until no write overlapped it. Writers make the
+# version odd while they work and bump it again when done, so readers never
+# block the writer and only retry in the rare case they raced with it.
+#
+# An owner with a `_read_timeout` has its writer in another process, which may
+# die mid-write and leave the version odd for good; after that many seconds of
+# retrying the read raises ConnectionError instead of spinning forever.
+def _consistent_read(owner, read):
+    timeout = getattr(owner, '_read_timeout', None)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        version = owner._version
+        if not version & 1:
+            result = read()
+            if owner._version == version:
+                return result
+        if deadline is not None and time.monotonic() > deadline:
+            raise ConnectionError("shared state left mid-write, the detection process stopped while writing")
+        time.sleep(0)  # Let the writer finish
+
+
+# Fixed-capacity ring buffer of samples backed by a NumPy structured array.
+#
+# Every sample is written twice, at slot i and i + capacity, so the most recent
+# `count` samples always form one contiguous slice and latest() can hand out a
+# zero-copy view without stitching two halves together. Memory is bounded at
+# 2 * capacity * SIGNAL_DTYPE.itemsize bytes (50 bytes per sample).
+#
+# Samples are numbered from 1 in arrival order. Numbers are never reused, not
+# even after clear(), and the buffer always holds a consecutive run of them, so
+# the position of any sequence number is computed rather than searched for.
+#
+# Writers (append, clear) serialize on a lock that readers never take.
+# snapshot() and since() copy under a seqlock instead, so request threads
+# neither block nor slow down the processing thread. latest() views are only
+# safe for the writer thread (or while nothing appends).
+class SignalRingBuffer:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._rows = np.zeros(2 * capacity, dtype=SIGNAL_DTYPE)
+        self._head = 0
+        self._count = 0
+        self._last_seq = 0
+        self._version = 0  # Seqlock version, odd while a write is in progress
+        self._write_lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    # Sequence number of the newest sample (0 before the first one)
+    @property
+    def last_seq(self):
+        return self._last_seq
+
+    # Append a batch of samples; returns a view of the newly stored ones. A
+    # batch larger than the buffer only leaves its newest `capacity` samples
+    # stored (all of them are still numbered), and is returned as passed in.
+    def append(self, rows):
+        arrived = len(rows)
+        stored = rows[-self.capacity:]
+        n = len(stored)
+        if n == 0:
+            return rows
+
+        with self._write_lock:
+            self._version += 1
+            slots = (self._head + np.arange(n)) % self.capacity
+            self._rows[slots] = stored
+            self._rows[slots + self.capacity] = stored
+            self._head = (self._head + n) % self.capacity
+            self._count = min(self._count + n, self.capacity)
+            self._last_seq += arrived
+            self._version += 1
+            return self._latest(n) if n == arrived else rows
+
+    def _latest(self, n):
+        n = min(n, self._count)
+        end = self._head + self.capacity
+        return self._rows[end - n:end]
+
+    # Zero-copy view of the `n` most recent samples (all of them by default)
+    def latest(self, n=None):
+        return self._latest(self._count if n is None else n)
+
+    # Copy of the `n` most recent samples, safe to use from any thread
+    def snapshot(self, n=None):
+        return _consistent_read(self, lambda: self._latest(self._count if n is None else n).copy())
+
+    # Copy of the samples numbered after `seq`, oldest first, and the sequence
+    # number of the first one. With `limit` only the oldest `limit` of them are
+    # returned, so a client can page forward without gaps. A `seq` of None
+    # returns the `limit` most recent samples instead. Samples that have
+    # already been overwritten are skipped, which shows as a jump in numbering.
+    def since(self, seq=None, limit=None):
+        return _consistent_read(self, lambda: self._since(seq, limit))
+
+    def _since(self, seq, limit):
+        oldest = self._last_seq - self._count + 1
+        if seq is None:
+            first = oldest if limit is None else max(oldest, self._last_seq - limit + 1)
+        else:
+            first = max(seq + 1, oldest)
+        n = self._last_seq - first + 1
+        if limit is not None:
+            n = min(n, limit)
+        n = max(n, 0)
+        end = self._head + self.capacity - (self._last_seq - (first + n - 1))
+        return self._rows[end - n:end].copy(), first
+
+    def clear(self):
+        with self._write_lock:
+            self._version += 1
+            self._head = 0
+            self._count = 0
+            self._version += 1
+
+
+# Bounded buffer of anomaly results, served newest first.
+#
+# Anomalies are kept in a ring of Python objects and numbered from 1 as they
+# are added; the number is stored in each anomaly under 'seq'. As with
+# SignalRingBuffer the ring always holds a consecutive run of numbers, so
+# since() finds its starting point by arithmetic and only touches the
+# anomalies it returns. Reads go through the same seqlock scheme.
+class AnomalyBuffer:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._items = [None] * capacity
+        self._count = 0
+        self._last_seq = 0
+        self._version = 0
+        self._write_lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def last_seq(self):
+        return self._last_seq
+
+    # Store an anomaly and return the sequence number given to it
+    def add(self, anomaly):
+        with self._write_lock:
+            self._version += 1
+            self._last_seq += 1
+            anomaly['seq'] = self._last_seq
+            self._items[(self._last_seq - 1) % self.capacity] = anomaly
+            self._count = min(self._count + 1, self.capacity)
+            self._version += 1
+            return self._last_seq
+
+    # Anomalies numbered first..last, newest first
+    def _range(self, first, last):
+        return [self._items[(seq - 1) % self.capacity] for seq in range(last, first - 1, -1)]
+
+    # Copy of the `n` newest anomalies (all of them by default), newest first
+    def snapshot(self, n=None):
+        def read():
+            count = self._count if n is None else min(n, self._count)
+            return self._range(self._last_seq - count + 1, self._last_seq)
+        return _consistent_read(self, read)
+
+    # Anomalies numbered after `seq`, newest first. With `limit` only the
+    # oldest `limit` of them are returned, so a client can page forward.
+    def since(self, seq, limit=None):
+        def read():
+            first = max(seq + 1, self._last_seq - self._count + 1)
+            last = self._last_seq if limit is None else min(self._last_seq, first + limit - 1)
+            return self._range(first, last)
+        return _consistent_read(self, read)
+
+    def clear(self):
+        with self._write_lock:
+            self._version += 1
+            self._items = [None] * self.capacity
+            self._count = 0
+            self._version += 1
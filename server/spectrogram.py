@@ -0,0 +1,188 @@
+import json
+import secrets
+import threading
+
+import numpy as np
+
+from wire_format import encode_spectrogram
+
+# Default number of most recent time bins returned by /api/spectrogram
+DEFAULT_MAX_TIME_POINTS = 50
+
+# Samples closer than this (in seconds / MHz) to a cell's axis values fall into it
+DEFAULT_TOLERANCE = 0.01
+
+# Column width (MHz) and column cap of the rolling spectrogram's frequency grid
+DEFAULT_FREQ_RESOLUTION = 0.1
+MAX_FREQ_BINS = 512
+
+
+# Snap values onto a grid of `resolution`; None keeps the exact values
+def quantize(values, resolution=None):
+    if not resolution:
+        return values
+    return np.round(values / resolution) * resolution
+
+
+# Max over every row of `grid` (along `axis`) whose coordinate satisfies
+# |coord - center| < tolerance for each of `centers`; both arrays are sorted.
+# Candidate rows come from a widened searchsorted range and are then checked
+# with the exact predicate so rounding at the edges matches a direct compare.
+def _window_max(grid, coords, centers, tolerance, axis):
+    grid = np.moveaxis(grid, axis, 0)
+    lo = np.searchsorted(coords, centers - 2 * tolerance, side='left')
+    hi = np.searchsorted(coords, centers + 2 * tolerance, side='right')
+
+    result = np.full((len(centers),) + grid.shape[1:], -np.inf)
+    for offset in range(int((hi - lo).max(initial=0))):
+        rows = lo + offset
+        valid = rows < hi
+        valid[valid] = np.abs(coords[rows[valid]] - centers[valid]) < tolerance
+        result[valid] = np.maximum(result[valid], grid[rows[valid]])
+    return np.moveaxis(result, 0, axis)
+
+
+# Vectorized time x frequency binning.
+#
+# A cell at (t, f) holds the maximum amplitude of every sample whose time and
+# frequency are both within `tolerance` of it, or 0 if there are none; with
+# tolerance=0 a cell only collects exact matches. The frequency axis is every
+# distinct frequency, the time axis the `max_time_points` most recent distinct
+# times. Returns (frequency_axis, time_axis, intensities) with intensities
+# shaped (len(time_axis), len(frequency_axis)).
+def bin_spectrogram(times, freqs, amplitudes, max_time_points=DEFAULT_MAX_TIME_POINTS,
+                    time_resolution=None, freq_resolution=None, tolerance=DEFAULT_TOLERANCE):
+    times = quantize(np.asarray(times, dtype=np.float64), time_resolution)
+    freqs = quantize(np.asarray(freqs, dtype=np.float64), freq_resolution)
+    amplitudes = np.asarray(amplitudes, dtype=np.float64)
+
+    if len(times) == 0:
+        return np.empty(0), np.empty(0), np.zeros((0, 0))
+
+    freq_axis = np.unique(freqs)
+    time_axis = np.unique(times)
+    if max_time_points and len(time_axis) > max_time_points:
+        time_axis = time_axis[-max_time_points:]
+        # Samples older than the window can still reach its first row
+        recent = times > time_axis[0] - 2 * tolerance if tolerance else times >= time_axis[0]
+        times, freqs, amplitudes = times[recent], freqs[recent], amplitudes[recent]
+
+    # Scatter-max every sample into its exact (time, frequency) cell
+    grid_times, time_index = np.unique(times, return_inverse=True)
+    freq_index = np.searchsorted(freq_axis, freqs)
+    grid = np.full(len(grid_times) * len(freq_axis), -np.inf)
+    np.maximum.at(grid, time_index * len(freq_axis) + freq_index, amplitudes)
+    grid = grid.reshape(len(grid_times), len(freq_axis))
+
+    # Widen each cell to the neighbours within the matching tolerance
+    if tolerance:
+        grid = _window_max(grid, grid_times, time_axis, tolerance, axis=0)
+        grid = _window_max(grid, freq_axis, freq_axis, tolerance, axis=1)
+    else:
+        grid = grid[np.searchsorted(grid_times, time_axis)]
+
+    grid[np.isneginf(grid)] = 0.0
+    return freq_axis, time_axis, grid
+
+
+# Fixed-size spectrogram maintained incrementally by the processing thread.
+#
+# Rows live in a ring buffer of `capacity` time bins over a fixed frequency grid
+# spanning `frequency_range`. Each update() bins only the new samples, writes
+# them over the oldest rows and pre-serializes the snapshot, so serving it is
+# O(1) no matter how many clients poll. snapshot() needs no lock: the snapshot
+# is an immutable (etag, payload) tuple replaced in a single assignment.
+class RollingSpectrogram:
+    def __init__(self, frequency_range, capacity=DEFAULT_MAX_TIME_POINTS,
+                 freq_resolution=DEFAULT_FREQ_RESOLUTION, time_resolution=None):
+        low, high = float(frequency_range[0]), float(frequency_range[1])
+        n_bins = int(round((high - low) / freq_resolution)) + 1
+        if n_bins > MAX_FREQ_BINS:
+            n_bins = MAX_FREQ_BINS
+            freq_resolution = (high - low) / (n_bins - 1)
+
+        self.capacity = capacity
+        self.freq_resolution = freq_resolution
+        self.time_resolution = time_resolution
+        self.frequencies = low + np.arange(n_bins) * freq_resolution
+        self.time_points = np.zeros(capacity)
+        self.intensities = np.zeros((capacity, n_bins))
+        self.head = 0
+        self.count = 0
+        self.version = 0
+
+        self._write_lock = threading.Lock()
+        self._snapshot = None
+        self._frame = None  # (version, time points, intensities) behind the snapshot
+        self._binary = {}  # encoding -> (version, bytes)
+        self._published = None  # (snapshot, frame), read as one pair by shared_state
+        # Random per instance (and process), so ETags of a replaced spectrogram
+        # are never reused; id(self) is, once the old one is freed
+        self._etag_prefix = f"spectrogram-{secrets.token_hex(8)}"
+
+    # Bin a batch of new samples into rows and append them to the ring.
+    # Returns the appended (time_points, intensities), or None if nothing was in range
+    def update(self, times, freqs, amplitudes):
+        times = quantize(np.asarray(times, dtype=np.float64), self.time_resolution)
+        columns = np.round((np.asarray(freqs, dtype=np.float64) - self.frequencies[0]) / self.freq_resolution)
+        in_range = (columns >= 0) & (columns < len(self.frequencies))
+        if not in_range.any():
+            return None
+        times = times[in_range]
+        columns = columns[in_range].astype(np.intp)
+        amplitudes = np.asarray(amplitudes, dtype=np.float64)[in_range]
+
+        new_times, row_index = np.unique(times, return_inverse=True)
+        rows = np.full((len(new_times), len(self.frequencies)), -np.inf)
+        np.maximum.at(rows, (row_index, columns), amplitudes)
+        rows[np.isneginf(rows)] = 0.0
+
+        # A batch longer than the ring only keeps its most recent rows
+        new_times, rows = new_times[-self.capacity:], rows[-self.capacity:]
+
+        with self._write_lock:
+            slots = (self.head + np.arange(len(new_times))) % self.capacity
+            self.time_points[slots] = new_times
+            self.intensities[slots] = rows
+            self.head = (self.head + len(new_times)) % self.capacity
+            self.count = min(self.count + len(new_times), self.capacity)
+            self.version += 1
+            self._publish()
+        return new_times, rows
+
+    # Rows in arrival order, oldest first
+    def _ordered(self):
+        order = (self.head - self.count + np.arange(self.count)) % self.capacity
+        return self.time_points[order], self.intensities[order]
+
+    def _publish(self):
+        time_points, intensities = self._ordered()
+        payload = json.dumps({
+            "frequencies": self.frequencies.tolist(),
+            "timePoints": time_points.tolist(),
+            "intensities": intensities.tolist(),
+            "version": self.version
+        })
+        self._frame = (self.version, time_points, intensities)
+        self._snapshot = (f"{self._etag_prefix}-{self.version}", payload)
+        self._published = (self._snapshot, self._frame)
+
+    # (etag, serialized JSON) of the latest update, or None before the first one
+    def snapshot(self):
+        return self._snapshot
+
+    # snapshot() and the (version, time points, intensities) frame behind it,
+    # taken together so they always belong to the same update
+    def published(self):
+        return self._published
+
+    # (etag, bytes) of the latest update in a wire_format binary encoding,
+    # encoded on the first request after an update and reused until the next.
+    # Works on the published frame only, so it never waits for update().
+    def binary_snapshot(self, encoding):
+        version, time_points, intensities = self._frame
+        cached = self._binary.get(encoding)
+        if cached is None or cached[0] != version:
+            cached = (version, encode_spectrogram(self.frequencies, time_points, intensities, encoding, version))
+            self._binary[encoding] = cached
+        return f"{self._etag_prefix}-{version}-{encoding}", cached[1]
@@ -0,0 +1,84 @@
+import struct
+
+import numpy as np
+
+# Media types a client can ask for in its Accept header; JSON stays the default
+JSON_MIME = 'application/json'
+FLOAT32_MIME = 'application/x-rf-float32'
+UINT8_MIME = 'application/x-rf-uint8'
+
+ENCODINGS = {FLOAT32_MIME: 'float32', UINT8_MIME: 'uint8'}
+_ENCODING_CODES = {'float32': 0, 'uint8': 1}
+
+FORMAT_VERSION = 2
+
+# Spectrogram header, 32 bytes: magic, format version, encoding (0 = float32,
+# 1 = uint8), reserved, number of time points, number of frequencies,
+# spectrogram version, and the intensity range a uint8 payload is scaled to
+SPECTROGRAM_HEADER = struct.Struct('<4sBBHIIIff4x')
+SPECTROGRAM_MAGIC = b'RFSG'
+
+# Signals header, 24 bytes: magic, format version, encoding (always float32),
+# reserved, number of signals, sequence number of the first one
+SIGNALS_HEADER = struct.Struct('<4sBBHIQ4x')
+SIGNALS_MAGIC = b'RFSI'
+
+
+# Encoding ('json', 'float32' or 'uint8') the client prefers among `offers`
+def negotiate(accept_mimetypes, offers=(FLOAT32_MIME, UINT8_MIME)):
+    best = accept_mimetypes.best_match((JSON_MIME,) + tuple(offers), default=JSON_MIME)
+    return ENCODINGS.get(best, 'json')
+
+
+def mimetype_for(encoding):
+    return FLOAT32_MIME if encoding == 'float32' else UINT8_MIME
+
+
+# Linear uint8 quantization of `values` onto [low, high]
+def quantize_uint8(values):
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return np.empty(values.shape, dtype=np.uint8), 0.0, 0.0
+    low, high = float(values.min()), float(values.max())
+    if high <= low:
+        return np.zeros(values.shape, dtype=np.uint8), low, high
+    scaled = np.rint((values - low) * (255.0 / (high - low)))
+    return scaled.astype(np.uint8), low, high
+
+
+# Spectrogram as header + time points (float64) + frequencies (float32) +
+# row-major intensities (float32, or uint8 scaled between the header's range).
+# Every section starts on a boundary matching its element size, so clients can
+# view the buffer directly as typed arrays.
+def encode_spectrogram(frequencies, time_points, intensities, encoding='float32', version=0):
+    intensities = np.asarray(intensities)
+    low = high = 0.0
+    if encoding == 'uint8':
+        body, low, high = quantize_uint8(intensities)
+    else:
+        body = np.ascontiguousarray(intensities, dtype='<f4')
+
+    header = SPECTROGRAM_HEADER.pack(
+        SPECTROGRAM_MAGIC, FORMAT_VERSION, _ENCODING_CODES[encoding], 0,
+        len(time_points), len(frequencies), version & 0xFFFFFFFF, low, high
+    )
+    return b''.join((
+        header,
+        np.asarray(time_points, dtype='<f8').tobytes(),
+        np.asarray(frequencies, dtype='<f4').tobytes(),
+        body.tobytes()
+    ))
+
+
+# Signal rows (signal_buffer.SIGNAL_DTYPE) as header + columns: time
+# (float64), frequency (float32), amplitude (float32), is_anomaly (uint8).
+# Rows are numbered consecutively from `first_seq`.
+def encode_signals(rows, first_seq=0):
+    header = SIGNALS_HEADER.pack(SIGNALS_MAGIC, FORMAT_VERSION, _ENCODING_CODES['float32'], 0, len(rows), first_seq)
+    return b''.join((
+        header,
+        np.asarray(rows['time'], dtype='<f8').tobytes(),
+        np.asarray(rows['frequency'], dtype='<f4').tobytes(),
+        np.asarray(rows['amplitude'], dtype='<f4').tobytes(),
+        np.asarray(rows['is_anomaly'], dtype=np.uint8).tobytes()
+    ))
@@ -0,0 +1,181 @@
+# Production entry point: one detection process, any number of HTTP workers.
+#
+# The detection process runs the detector exactly once. It shares the signal
+# buffer, spectrogram and anomalies through memory-mapped files (see
+# shared_state.py), which the workers read directly. Requests that change or
+# inspect the detector itself (start, stop, clear-anomalies, model-stats,
+# metrics, profile, check-hardware) are forwarded to it over a Unix socket, and
+# the push stream is relayed over the same socket (see detector_link.py).
+#
+#   python wsgi.py detector                    run the detection process
+#   gunicorn -w 4 -k gthread --threads 32 -b 0.0.0.0:5000 wsgi:app
+#                                              run HTTP workers with any WSGI server
+#   python wsgi.py serve --workers 4           both at once (gunicorn if installed,
+#                                              otherwise werkzeug's threaded server)
+#
+# Both sides find each other through RF_SHARED_STATE_DIR (default
+# /dev/shm/rf-detector). Every /api/stream client holds a request thread for
+# as long as it stays connected, so workers need threads (or an async worker
+# class such as gevent); gunicorn's default sync workers would be used up by a
+# handful of dashboards and killed at their timeout.
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from flask import Response, jsonify, request
+
+from detector_link import DetectorService, DetectorClient, socket_path
+from shared_state import SharedEngineView, share_engine_state, remove_engine_state, default_state_dir
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.environ.get("RF_SHARED_STATE_DIR") or default_state_dir()
+
+# View functions of app.py that run in the detection process
+FORWARDED_ENDPOINTS = (
+    'start_processing', 'stop_processing', 'clear_anomalies', 'get_model_stats',
+    'get_metrics', 'get_profile', 'check_hardware'
+)
+
+# Seconds `serve` waits for the detection process to open its socket
+DETECTOR_STARTUP_TIMEOUT = 30.0
+
+# Seconds between checks of a detection process started by `serve` whether
+# `serve` is still alive
+PARENT_POLL_INTERVAL = 1.0
+
+# Request threads per gunicorn worker; bounds the /api/stream clients a worker
+# can hold next to ordinary requests
+DEFAULT_THREADS = 32
+
+
+# Flask app of an HTTP worker: app.py's routes reading from the shared state
+def create_worker_app(directory=STATE_DIR):
+    import app as rf_app
+
+    rf_app.engine = SharedEngineView(directory)
+    client = DetectorClient(directory)
+
+    def forward(**kwargs):
+        status, headers, body = client.request(
+            request.method, request.path, request.query_string,
+            {name: value for name, value in request.headers if name in ('Accept', 'Content-Type')},
+            request.get_data()
+        )
+        return Response(body, status=status, headers=headers)
+
+    for endpoint in FORWARDED_ENDPOINTS:
+        rf_app.app.view_functions[endpoint] = forward
+
+    stream_events = rf_app.app.view_functions['stream_events']
+
+    def relayed_stream_events():
+        client.relay_events(rf_app.event_broadcaster)
+        return stream_events()
+
+    rf_app.app.view_functions['stream_events'] = relayed_stream_events
+
+    @rf_app.app.errorhandler(ConnectionError)
+    def detector_unavailable(e):
+        return jsonify({"error": str(e)}), 503
+
+    return rf_app.app
+
+
+# Send ourselves SIGTERM once process `parent_pid` has gone, e.g. a `serve`
+# that was killed before it could stop us
+def _exit_with_parent(parent_pid):
+    while os.getppid() == parent_pid:
+        time.sleep(PARENT_POLL_INTERVAL)
+    print(f"Parent process {parent_pid} exited, stopping")
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+# Detection process: shares the engine's state under `directory`, prepares the
+# model and serves the workers until terminated (or, with `parent_pid`, until
+# that process exits)
+def run_detector(directory=STATE_DIR, parent_pid=None):
+    import app as rf_app
+
+    # Exit through the cleanup below on SIGTERM too, so workers answer 503
+    # instead of serving the last state
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    if parent_pid is not None:
+        threading.Thread(target=_exit_with_parent, args=(parent_pid,), daemon=True).start()
+    share_engine_state(rf_app.engine, directory, rf_app.ANOMALY_BUFFER_CAPACITY)
+    try:
+        threading.Thread(target=rf_app.warm_up, daemon=True).start()
+        DetectorService(directory, rf_app.app, rf_app.event_broadcaster).serve_forever()
+    finally:
+        remove_engine_state(directory)
+
+
+# Start the detection process, then the HTTP workers in the foreground. Both
+# are stopped when this returns, including on SIGTERM; should this process be
+# killed outright, the detection process notices and exits on its own.
+def serve(directory, workers, threads, host, port):
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    env = dict(os.environ, RF_SHARED_STATE_DIR=directory)
+    detector = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), 'detector', '--parent-pid', str(os.getpid())],
+        cwd=SERVER_DIR, env=env
+    )
+    http_server = None
+    try:
+        deadline = time.time() + DETECTOR_STARTUP_TIMEOUT
+        while not os.path.exists(socket_path(directory)):
+            if detector.poll() is not None or time.time() > deadline:
+                sys.exit("Detection process failed to start")
+            time.sleep(0.1)
+
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            gunicorn = None
+        if gunicorn:
+            http_server = subprocess.Popen([
+                sys.executable, '-m', 'gunicorn', '-w', str(workers), '-k', 'gthread', '--threads', str(threads),
+                '-b', f"{host}:{port}", '--chdir', SERVER_DIR, 'wsgi:app'
+            ], env=env)
+            http_server.wait()
+        else:
+            # werkzeug can't combine processes with threads, and a forking
+            # server would spend a whole process per stream client
+            from werkzeug.serving import run_simple
+            print("gunicorn not installed, serving with werkzeug's threaded server in one process (pip install gunicorn)")
+            run_simple(host, port, create_worker_app(directory), threaded=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in (http_server, detector):
+            if process is not None and process.poll() is None:
+                process.terminate()
+                process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RF anomaly detection production server")
+    parser.add_argument('role', choices=['detector', 'serve'])
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="HTTP worker processes")
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS, help="request threads per worker")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--parent-pid', type=int, help="detector: exit when this process exits (set by serve)")
+    args = parser.parse_args()
+
+    if args.role == 'detector':
+        run_detector(STATE_DIR, args.parent_pid)
+    else:
+        serve(STATE_DIR, args.workers, args.threads, args.host, args.port)
+
+
+if __name__ == '__main__':
+    main()
+elif __name__ != '__mp_main__':
+    # Imported by a WSGI server as wsgi:app (not re-imported as the main module
+    # of a spawned process, e.g. a sub-band scoring worker)
+    app = create_worker_app(STATE_DIR)